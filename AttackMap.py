@@ -0,0 +1,119 @@
+from Bitboard import attacksFrom
+
+
+# PieceType values of the pieces attacking along rays
+SLIDING_PIECES = {3, 4, 5, -3, -4, -5}
+
+
+class AttackMap:
+    """
+    Stores the squares attacked by every piece on the board as bitboards and keeps them up to date
+    incrementally. After a move only the pieces on the changed squares and the sliding pieces whose
+    rays reach those squares are recomputed.
+    - attacks: bitboard of squares attacked by the piece on each square, 0 for empty squares
+    - whiteSquares: bitboard of squares holding white pieces
+    - blackSquares: bitboard of squares holding black pieces
+    - sliders: bitboard of squares holding bishops, rooks and queens of either side
+    """
+    def __init__(self, board : list) -> None:
+
+        # Board the attacks are read from, indexed board[y][x]
+        self.board = board
+
+        self.attacks = [0] * 64
+        self.whiteSquares = 0
+        self.blackSquares = 0
+        self.sliders = 0
+
+        # Squares attacked by each side, None until asked for after a change
+        self.whiteAttacked = None
+        self.blackAttacked = None
+
+        # Compute every piece from scratch
+        self.update((1 << 64) - 1)
+
+
+    def update(self, changed : int) -> None:
+        """
+        Brings the map up to date after squares have been written on the board
+        - changed: bitboard of the squares whose contents changed
+        """
+        board = self.board
+        attacks = self.attacks
+
+        # Update the piece masks for the changed squares
+        bits = changed
+        while bits:
+            bit = bits & -bits
+            square = bit.bit_length() - 1
+            bits ^= bit
+
+            piece = board[square >> 3][square & 7]
+
+            self.whiteSquares &= ~bit
+            self.blackSquares &= ~bit
+            self.sliders &= ~bit
+
+            if piece > 0:
+                self.whiteSquares |= bit
+            elif piece < 0:
+                self.blackSquares |= bit
+
+            if piece in SLIDING_PIECES:
+                self.sliders |= bit
+
+        occupancy = self.whiteSquares | self.blackSquares
+
+        # Sliding pieces whose rays reached a changed square are blocked or opened by the move
+        recompute = changed
+        bits = self.sliders & ~changed
+        while bits:
+            bit = bits & -bits
+            bits ^= bit
+
+            if attacks[bit.bit_length() - 1] & changed:
+                recompute |= bit
+
+        # Recompute the attacks of the affected squares
+        while recompute:
+            bit = recompute & -recompute
+            square = bit.bit_length() - 1
+            recompute ^= bit
+
+            piece = board[square >> 3][square & 7]
+            attacks[square] = attacksFrom(piece, square, occupancy) if piece else 0
+
+        # Side totals are rebuilt on the next query
+        self.whiteAttacked = None
+        self.blackAttacked = None
+
+
+    def attackedBy(self, white : bool) -> int:
+        """
+        Returns the bitboard of squares attacked by one side, including squares holding its own pieces
+        - white: True for the squares attacked by white, False for black
+        """
+        if white:
+            if self.whiteAttacked is None:
+                self.whiteAttacked = self.union(self.whiteSquares)
+            return self.whiteAttacked
+
+        if self.blackAttacked is None:
+            self.blackAttacked = self.union(self.blackSquares)
+        return self.blackAttacked
+
+
+    def union(self, squares : int) -> int:
+        """
+        Returns the union of the attacks of the pieces on a set of squares
+        - squares: bitboard of the squares to combine
+        """
+        attacks = self.attacks
+        attacked = 0
+
+        while squares:
+            bit = squares & -squares
+            attacked |= attacks[bit.bit_length() - 1]
+            squares ^= bit
+
+        return attacked
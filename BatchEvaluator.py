@@ -0,0 +1,205 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+from Chess import Chess, PIECE_CLASSES
+from PieceSquareTables import PieceSquareTables
+
+
+class BatchEvaluator:
+    """
+    Evaluates batches of positions at once with NumPy. Positions are packed into an N x 64 int8
+    array of PieceType values indexed by square y * 8 + x, the encoding Chess.board uses. Scores
+    are in centipawns from white's view and add up:
+    - material, the Chess piece values
+    - piece-square tables, blended from the middlegame to the endgame tables by the game phase
+    - mobility, the squares knights, bishops, rooks and queens reach that don't hold their own pieces
+    - pawn structure, penalties for doubled and isolated pawns and a bonus for passed pawns
+    """
+
+    MOBILITY_WEIGHT = 2
+    DOUBLED_PAWN_PENALTY = 15
+    ISOLATED_PAWN_PENALTY = 10
+
+    # Passed pawn bonus by row for white pawns, which promote on row 0. Black pawns read it upside down.
+    PASSED_PAWN_BONUS = [0, 120, 80, 50, 30, 20, 10, 0]
+
+    # Steps of the pieces as (dy, dx)
+    KNIGHT_STEPS = [(-2, -1), (-2, 1), (-1, -2), (1, -2), (2, -1), (2, 1), (1, 2), (-1, 2)]
+    ROOK_DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+    BISHOP_DIRECTIONS = [(-1, 1), (-1, -1), (1, -1), (1, 1)]
+
+    def __init__(self) -> None:
+        """
+        Creates an evaluator, turning the evaluation tables into arrays indexed by PieceType value + 6
+        """
+        self.middlegame = np.array(PieceSquareTables.MIDDLEGAME, dtype=np.int32)
+        self.endgame = np.array(PieceSquareTables.ENDGAME, dtype=np.int32)
+
+        # Kings are on the board for both sides, so their values cancel out
+        self.material = np.array([PIECE_CLASSES[piece].value * 100 if piece else 0 for piece in range(-6, 7)], dtype=np.int32)
+        self.phase = np.array([PieceSquareTables.PHASE_WEIGHTS[abs(piece)] for piece in range(-6, 7)], dtype=np.int32)
+
+        self.squares = np.arange(64)
+        self.rows = np.arange(8).reshape(1, 8, 1)
+        self.passedWhite = np.array(BatchEvaluator.PASSED_PAWN_BONUS, dtype=np.int32).reshape(1, 8, 1)
+        self.passedBlack = np.array(BatchEvaluator.PASSED_PAWN_BONUS[::-1], dtype=np.int32).reshape(1, 8, 1)
+
+
+    def pack(games : list) -> np.ndarray:
+        """
+        Returns the boards of games as an N x 64 int8 array
+        - games: Chess games to pack
+        """
+        return np.array([[piece for row in game.board for piece in row] for game in games], dtype=np.int8)
+
+
+    def evaluateGames(self, games : list) -> np.ndarray:
+        """
+        Returns the scores of games from the view of the side to move in each
+        - games: Chess games to evaluate
+        """
+        return self.evaluate(BatchEvaluator.pack(games), [game.whiteTurn for game in games])
+
+
+    def evaluate(self, boards : np.ndarray, whiteToMove = None) -> np.ndarray:
+        """
+        Returns the scores of a batch of positions in centipawns
+        - boards: N x 64 int8 array of PieceType values, or N x 8 x 8
+        - whiteToMove: N booleans to score each position from the view of the side to move,
+          None to score from white's view
+        """
+        boards = np.asarray(boards, dtype=np.int8).reshape(-1, 64)
+        index = boards.astype(np.intp) + 6
+
+        material = self.material[index].sum(axis=1, dtype=np.int64)
+        phase = np.minimum(self.phase[index].sum(axis=1, dtype=np.int64), PieceSquareTables.MAX_PHASE)
+
+        # Piece-square tables, moving from the middlegame to the endgame as pieces come off
+        middlegame = self.middlegame[index, self.squares].sum(axis=1, dtype=np.int64)
+        endgame = self.endgame[index, self.squares].sum(axis=1, dtype=np.int64)
+        positional = (middlegame * phase + endgame * (PieceSquareTables.MAX_PHASE - phase)) // PieceSquareTables.MAX_PHASE
+
+        scores = material + positional + self.mobility(boards) + self.pawnStructure(boards)
+
+        if whiteToMove is not None:
+            scores = np.where(np.asarray(whiteToMove, dtype=bool), scores, -scores)
+
+        return scores
+
+
+    def shift(planes : np.ndarray, dy : int, dx : int) -> np.ndarray:
+        """
+        Returns N x 8 x 8 planes moved by (dy, dx), dropping what moves off the board
+        """
+        shifted = np.zeros_like(planes)
+        shifted[:, max(dy, 0):8 + min(dy, 0), max(dx, 0):8 + min(dx, 0)] = planes[:, max(-dy, 0):8 + min(-dy, 0), max(-dx, 0):8 + min(-dx, 0)]
+
+        return shifted
+
+
+    def mobility(self, boards : np.ndarray) -> np.ndarray:
+        """
+        Returns the mobility term of N x 64 boards, white's reachable squares less black's.
+        Checks and pins are ignored, so this is an estimate of the legal move count.
+        """
+        planes = boards.reshape(-1, 8, 8)
+        empty = (planes == 0).astype(np.int32)
+        scores = np.zeros(len(planes), dtype=np.int64)
+
+        for sign in (1, -1):
+            reachable = (planes * sign <= 0).astype(np.int32)
+            queens = planes == sign * 5
+            moves = np.zeros(len(planes), dtype=np.int64)
+
+            # Knights reach their targets whatever is in between
+            knights = (planes == sign * 2).astype(np.int32)
+            for dy, dx in BatchEvaluator.KNIGHT_STEPS:
+                moves += (BatchEvaluator.shift(knights, dy, dx) * reachable).sum(axis=(1, 2))
+
+            # Sliders walk each ray one square at a time, stopping after the first piece
+            for directions, sliders in ((BatchEvaluator.ROOK_DIRECTIONS, (planes == sign * 4) | queens),
+                                        (BatchEvaluator.BISHOP_DIRECTIONS, (planes == sign * 3) | queens)):
+                sliders = sliders.astype(np.int32)
+
+                for dy, dx in directions:
+                    front = sliders
+                    for step in range(7):
+                        front = BatchEvaluator.shift(front, dy, dx)
+                        moves += (front * reachable).sum(axis=(1, 2))
+                        front = front * empty
+
+            scores += sign * moves * BatchEvaluator.MOBILITY_WEIGHT
+
+        return scores
+
+
+    def pawnStructure(self, boards : np.ndarray) -> np.ndarray:
+        """
+        Returns the pawn structure term of N x 64 boards from white's view
+        """
+        planes = boards.reshape(-1, 8, 8)
+        white = planes == 1
+        black = planes == -1
+        rows = self.rows
+        scores = np.zeros(len(planes), dtype=np.int64)
+
+        # Doubled pawns share a file, isolated pawns have no pawns on the files beside them
+        for pawns, sign in ((white, 1), (black, -1)):
+            files = pawns.sum(axis=1)
+            beside = np.pad(files, ((0, 0), (1, 1)))
+            doubled = np.maximum(files - 1, 0).sum(axis=1)
+            isolated = (files * ((beside[:, :-2] == 0) & (beside[:, 2:] == 0))).sum(axis=1)
+
+            scores -= sign * (doubled * BatchEvaluator.DOUBLED_PAWN_PENALTY + isolated * BatchEvaluator.ISOLATED_PAWN_PENALTY)
+
+        # White pawns are passed if no black pawn is ahead of them, at a lower row, on their file or the files beside it
+        blackFront = np.pad(np.where(black, rows, 8).min(axis=1), ((0, 0), (1, 1)), constant_values=8)
+        blackFront = np.minimum(np.minimum(blackFront[:, :-2], blackFront[:, 1:-1]), blackFront[:, 2:])
+        passedWhite = white & (blackFront[:, np.newaxis, :] >= rows)
+
+        # and black pawns if no white pawn is at a higher row
+        whiteFront = np.pad(np.where(white, rows, -1).max(axis=1), ((0, 0), (1, 1)), constant_values=-1)
+        whiteFront = np.maximum(np.maximum(whiteFront[:, :-2], whiteFront[:, 1:-1]), whiteFront[:, 2:])
+        passedBlack = black & (whiteFront[:, np.newaxis, :] <= rows)
+
+        scores += (passedWhite * self.passedWhite).sum(axis=(1, 2)) - (passedBlack * self.passedBlack).sum(axis=(1, 2))
+
+        return scores
+
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Measure the throughput of the batch evaluator')
+    parser.add_argument('--positions', type=int, default=2000, help='random positions to evaluate')
+    parser.add_argument('--repeat', type=int, default=10, help='times to evaluate the batch')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the random games')
+    args = parser.parse_args()
+
+    # Collect positions from random games
+    generator = random.Random(args.seed)
+    games = []
+    while len(games) < args.positions:
+        game = Chess()
+        for ply in range(generator.randint(0, 80)):
+            moves = game.legalMoves()
+            if not moves:
+                break
+            game.makeMove(generator.choice(moves))
+        games.append(game)
+
+    evaluator = BatchEvaluator()
+    boards = BatchEvaluator.pack(games)
+
+    start = time.perf_counter()
+    for i in range(args.repeat):
+        scores = evaluator.evaluate(boards)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    print('{} positions x {} in {:.3f}s, {:.0f} positions/s, mean score {:.1f}'.format(len(boards), args.repeat, elapsed, len(boards) * args.repeat / elapsed, float(scores.mean())))
+
+if __name__ == "__main__":
+    main()
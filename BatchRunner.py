@@ -0,0 +1,220 @@
+import argparse
+import collections
+import multiprocessing
+import time
+from typing import Iterator
+
+from Chess import Chess
+from Move import Move
+from Perft import Perft
+from PgnReader import PgnReader
+from Search import Search
+from TranspositionTable import TranspositionTable
+
+
+# Transposition table of a worker process, created by its first search and kept between tasks
+WORKER_TABLE = None
+
+# First field of the result of an item whose task raised an error, followed by the error message
+ERROR = 'error'
+
+
+class BatchRunner:
+    """
+    Runs an analysis task over a stream of positions or games on a pool of worker processes.
+    Positions are sent to the workers as FEN strings and games as (FEN, encoded moves), never as
+    pickled Chess objects. Items are sent in chunks to keep the messages between processes few,
+    only a bounded number of chunks are in flight so input streams are never read whole, and
+    results are yielded in input order. An item whose task raises gives (ERROR, message) in place
+    of its result, so one bad input doesn't end the batch.
+    - processes: number of worker processes
+    - chunkSize: items sent to a worker at a time
+    """
+
+    # Chunks in flight for each worker, enough to keep every worker busy while results are read
+    CHUNKS_PER_PROCESS = 4
+
+    def __init__(self, processes : int = None, chunkSize : int = 16) -> None:
+        """
+        Creates a runner, its pool is started by run
+        - processes: number of worker processes, the number of cores if None
+        - chunkSize: items sent to a worker at a time
+        """
+        self.processes = processes or multiprocessing.cpu_count()
+        self.chunkSize = chunkSize
+
+
+    def run(self, task, items) -> Iterator:
+        """
+        Yields task(item) for every item, in the order of the items
+        - task: module level function taking one item, so it can be sent to the workers
+        - items: iterable of serialized positions or games, read as the workers need them
+        """
+        with multiprocessing.Pool(self.processes) as pool:
+            pending = collections.deque()
+            limit = self.processes * BatchRunner.CHUNKS_PER_PROCESS
+
+            for chunk in BatchRunner.chunks(items, self.chunkSize):
+                pending.append(pool.apply_async(runChunk, (task, chunk)))
+
+                # Wait on the oldest chunk once enough are in flight
+                if len(pending) >= limit:
+                    yield from pending.popleft().get()
+
+            while pending:
+                yield from pending.popleft().get()
+
+
+    def chunks(items, size : int) -> Iterator[list]:
+        """
+        Yields lists of up to size items
+        """
+        chunk = []
+
+        for item in items:
+            chunk.append(item)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+
+    def serializeGame(game : Chess) -> tuple:
+        """
+        Returns a game as (FEN of its starting position, encoded moves played), the game is left unchanged
+        - game: game to serialize
+        """
+        moves = [record[0] for record in game.undoStack]
+
+        # Take the moves back to reach the starting position, then play them again
+        for move in moves:
+            game.unmakeMove()
+        fen = game.toFEN()
+        for move in moves:
+            game.makeMove(move)
+
+        return (fen, moves)
+
+
+    def deserializeGame(serialized : tuple) -> Chess:
+        """
+        Returns the game of a (FEN, encoded moves) pair from serializeGame
+        """
+        fen, moves = serialized
+        game = Chess(fen=fen)
+
+        for move in moves:
+            game.makeMove(move)
+
+        return game
+
+
+
+def runChunk(task, chunk : list) -> list:
+    """
+    Runs a task over a chunk of items in a worker process, turning the errors of an item into its result
+    """
+    results = []
+
+    for item in chunk:
+        try:
+            results.append(task(item))
+        except Exception as error:
+            results.append((ERROR, '{}: {}'.format(type(error).__name__, error)))
+
+    return results
+
+
+def searchPosition(item : tuple) -> tuple:
+    """
+    Searches a position, returning (best move, score, nodes)
+    - item: (FEN, depth)
+    """
+    global WORKER_TABLE
+    if WORKER_TABLE is None:
+        WORKER_TABLE = TranspositionTable()
+
+    fen, depth = item
+    search = Search(Chess(fen=fen), WORKER_TABLE)
+    bestMove, pv = search.search(depth)
+
+    return (Move.toString(bestMove) if bestMove else '(none)', search.score, search.nodes)
+
+
+def perftPosition(item : tuple) -> int:
+    """
+    Counts the leaf nodes of the legal move tree of a position
+    - item: (FEN, depth)
+    """
+    fen, depth = item
+    return Perft.perft(Chess(fen=fen), depth)
+
+
+def replayGame(item : tuple) -> tuple:
+    """
+    Replays a game from its SAN moves, returning (plies, final FEN). A move that can't be played
+    raises ValueError, which runChunk reports as the game's error.
+    - item: (FEN of the starting position or None, SAN moves)
+    """
+    fen, moves = item
+    tags = {'FEN': fen} if fen else {}
+    game = PgnReader.startPosition(tags)
+    plies = 0
+
+    for game, move in PgnReader.replay(tags, moves):
+        plies += 1
+
+    return (plies, game.toFEN())
+
+
+TASKS = {'search': searchPosition, 'perft': perftPosition}
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Analyse positions or games on a pool of worker processes')
+    parser.add_argument('--fens', default=None, help='file with one FEN per line to search or perft')
+    parser.add_argument('--pgn', default=None, help='PGN file of games to replay')
+    parser.add_argument('--task', choices=sorted(TASKS), default='search', help='analysis to run on each FEN')
+    parser.add_argument('--depth', type=int, default=3, help='search or perft depth')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes, the number of cores by default')
+    parser.add_argument('--chunk', type=int, default=16, help='items sent to a worker at a time')
+    parser.add_argument('--quiet', action='store_true', help='only print the throughput')
+    args = parser.parse_args()
+
+    if (args.fens is None) == (args.pgn is None):
+        parser.error('give one of --fens or --pgn')
+
+    runner = BatchRunner(args.processes, args.chunk)
+
+    if args.fens is not None:
+        lines = open(args.fens)
+        items = ((line.strip(), args.depth) for line in lines if line.strip())
+        task = TASKS[args.task]
+    else:
+        lines = None
+        items = ((tags.get('FEN'), moves) for tags, moves, result in PgnReader.readFile(args.pgn))
+        task = replayGame
+
+    start = time.perf_counter()
+    count = 0
+    errors = 0
+
+    for result in runner.run(task, items):
+        count += 1
+        if isinstance(result, tuple) and result[0] == ERROR:
+            errors += 1
+        if not args.quiet:
+            print(count, *(result if isinstance(result, tuple) else (result,)))
+
+    if lines is not None:
+        lines.close()
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    print('{} items in {:.2f}s with {} processes, {:.1f} items/s, {} errors'.format(count, elapsed, runner.processes, count / elapsed, errors))
+
+if __name__ == "__main__":
+    main()
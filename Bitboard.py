@@ -0,0 +1,152 @@
+from PieceType import PieceType
+
+
+# Squares are indexed as y * 8 + x so bit 0 is the top left tile of Chess.board. Every step and
+# ray table of the engine is built here as lists of square indexes, and the bitboards below, the
+# (x, y) tables of Chess and the tables of Tablebase are views of them.
+BOARD_SIZE = 8
+
+# Steps of the pieces as (x step, y step), in the order Chess generates their moves. White pawns
+# capture up the board towards y = 0, black pawns down towards y = 7.
+KNIGHT_OFFSETS = [(-1, -2), (1, -2), (-2, -1), (-2, 1), (-1, 2), (1, 2), (2, 1), (2, -1)]
+KING_OFFSETS = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+WHITE_PAWN_OFFSETS = [(-1, -1), (1, -1)]
+BLACK_PAWN_OFFSETS = [(-1, 1), (1, 1)]
+
+# Ray directions as (x step, y step), rook directions then bishop directions in the order Chess
+# generates their moves. Positive rays walk towards higher square indexes
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1), (1, -1), (-1, -1), (-1, 1), (1, 1)]
+POSITIVE_DIRECTIONS = [dy > 0 or (dy == 0 and dx > 0) for dx, dy in DIRECTIONS]
+ROOK_DIRECTIONS = [0, 1, 2, 3]
+BISHOP_DIRECTIONS = [4, 5, 6, 7]
+QUEEN_DIRECTIONS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+
+# Ray directions for each sliding piece, indexed by the absolute PieceType value
+SLIDER_DIRECTIONS = [None, None, None, BISHOP_DIRECTIONS, ROOK_DIRECTIONS, QUEEN_DIRECTIONS, None]
+
+def buildStepTable(steps : list) -> list:
+    """
+    Builds a 64 entry table of the in bounds squares reached by each of the steps, in step order
+    - steps: list of (x step, y step) offsets
+    """
+    table = []
+
+    for square in range(64):
+        x, y = square % BOARD_SIZE, square // BOARD_SIZE
+        table.append([(y + dy) * BOARD_SIZE + x + dx for dx, dy in steps if 0 <= x + dx < BOARD_SIZE and 0 <= y + dy < BOARD_SIZE])
+
+    return table
+
+
+def buildRayTable() -> list:
+    """
+    Builds a table indexed by [direction][square] of the squares on the ray, walking outward from
+    the square, not including the starting square
+    """
+    table = []
+
+    for dx, dy in DIRECTIONS:
+        rays = []
+
+        for square in range(64):
+            newX, newY = square % BOARD_SIZE + dx, square // BOARD_SIZE + dy
+            ray = []
+
+            while 0 <= newX < BOARD_SIZE and 0 <= newY < BOARD_SIZE:
+                ray.append(newY * BOARD_SIZE + newX)
+                newX, newY = newX + dx, newY + dy
+
+            rays.append(ray)
+
+        table.append(rays)
+
+    return table
+
+
+def raysBySquare(directions : list) -> list:
+    """
+    Returns, for each square, its rays in the given directions, leaving out rays that leave the
+    board at once
+    - directions: indexes into DIRECTIONS
+    """
+    return [[SQUARE_RAYS[direction][square] for direction in directions if SQUARE_RAYS[direction][square]] for square in range(64)]
+
+
+def toBitboard(squares : list) -> int:
+    """
+    Returns the bitboard of a list of square indexes
+    """
+    bitboard = 0
+    for square in squares:
+        bitboard |= 1 << square
+    return bitboard
+
+
+# Square tables, computed once at import
+KNIGHT_SQUARES = buildStepTable(KNIGHT_OFFSETS)
+KING_SQUARES = buildStepTable(KING_OFFSETS)
+WHITE_PAWN_SQUARES = buildStepTable(WHITE_PAWN_OFFSETS)
+BLACK_PAWN_SQUARES = buildStepTable(BLACK_PAWN_OFFSETS)
+SQUARE_RAYS = buildRayTable()
+ROOK_SQUARES = raysBySquare(ROOK_DIRECTIONS)
+BISHOP_SQUARES = raysBySquare(BISHOP_DIRECTIONS)
+QUEEN_SQUARES = raysBySquare(QUEEN_DIRECTIONS)
+
+# Attack tables, the same squares as bitboards
+KNIGHT_ATTACKS = [toBitboard(targets) for targets in KNIGHT_SQUARES]
+KING_ATTACKS = [toBitboard(targets) for targets in KING_SQUARES]
+WHITE_PAWN_ATTACKS = [toBitboard(targets) for targets in WHITE_PAWN_SQUARES]
+BLACK_PAWN_ATTACKS = [toBitboard(targets) for targets in BLACK_PAWN_SQUARES]
+RAYS = [[toBitboard(ray) for ray in rays] for rays in SQUARE_RAYS]
+
+
+def slidingAttacks(square : int, directions : list, occupancy : int) -> int:
+    """
+    Returns the bitboard of squares attacked from a square along the given ray directions.
+    Each ray stops at, and includes, the first occupied square.
+    - square: square index of the sliding piece
+    - directions: indexes into DIRECTIONS
+    - occupancy: bitboard of every occupied square
+    """
+    attacks = 0
+
+    for direction in directions:
+        ray = RAYS[direction][square]
+        blockers = ray & occupancy
+
+        # Cut the ray off behind the closest blocker
+        if blockers:
+            if POSITIVE_DIRECTIONS[direction]:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+
+            ray ^= RAYS[direction][blocker]
+
+        attacks |= ray
+
+    return attacks
+
+
+
+def attacksFrom(piece : int, square : int, occupancy : int) -> int:
+    """
+    Returns the bitboard of squares a piece on a square attacks, including squares holding
+    pieces of its own color
+    - piece: PieceType value of the piece
+    - square: square index of the piece
+    - occupancy: bitboard of every occupied square
+    """
+    if piece == PieceType.WHITEPAWN.value:
+        return WHITE_PAWN_ATTACKS[square]
+    elif piece == PieceType.BLACKPAWN.value:
+        return BLACK_PAWN_ATTACKS[square]
+
+    kind = abs(piece)
+
+    if kind == PieceType.WHITEKNIGHT.value:
+        return KNIGHT_ATTACKS[square]
+    elif kind == PieceType.WHITEKING.value:
+        return KING_ATTACKS[square]
+
+    return slidingAttacks(square, SLIDER_DIRECTIONS[kind], occupancy)
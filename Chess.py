@@ -1,4 +1,11 @@
+import sys
+
 from PieceType import PieceType
+from Move import Move
+from AttackMap import AttackMap
+from Bitboard import KNIGHT_SQUARES, KING_SQUARES, WHITE_PAWN_SQUARES, BLACK_PAWN_SQUARES, ROOK_SQUARES, BISHOP_SQUARES, QUEEN_SQUARES
+from Zobrist import Zobrist
+from PieceSquareTables import PieceSquareTables
 
 
 class Chess:
@@ -8,11 +15,20 @@ class Chess:
 
     BOARD_SIZE = 8
 
-    def __init__(self) -> None:
+    # PieceType values of the piece letters used in Forsyth-Edwards Notation
+    FEN_PIECES = {
+        'P': PieceType.WHITEPAWN.value, 'N': PieceType.WHITEKNIGHT.value, 'B': PieceType.WHITEBISHOP.value,
+        'R': PieceType.WHITEROOK.value, 'Q': PieceType.WHITEQUEEN.value, 'K': PieceType.WHITEKING.value,
+        'p': PieceType.BLACKPAWN.value, 'n': PieceType.BLACKKNIGHT.value, 'b': PieceType.BLACKBISHOP.value,
+        'r': PieceType.BLACKROOK.value, 'q': PieceType.BLACKQUEEN.value, 'k': PieceType.BLACKKING.value,
+    }
+
+    def __init__(self, fen : str = None) -> None:
         """
         Creates the initial state of the chess game
         - board: 2d array with 0's as empty space and piece values according to PieceType enum
         - whiteTurn: True if the turn is white, false if the turn is black
+        - fen: position to start from in Forsyth-Edwards Notation, the initial position if None
         """
         # Stores the pieces
         self.whitePieces = []
@@ -21,14 +37,12 @@ class Chess:
         # Stores piece value difference. + for white winning, - for black winning
         self.value = 0
 
-        # stores the game board
-        self.board = Chess.initializeGame()
-
-        # Create the pieces
-        self.initializePieces()
-
-        # Keeps track of turns
+        # Keeps track of turns, the move number goes up after every black move
         self.whiteTurn = True
+        self.fullMoveNumber = 1
+
+        # Plies since the last capture or pawn move, for the fifty-move rule
+        self.halfMoveClock = 0
 
         # Keeps track of whether or not king is in check
         self.whiteInCheck = False
@@ -38,6 +52,37 @@ class Chess:
         self.twoWhitePawnMovement = set()
         self.twoBlackPawnMovement = set()
 
+        # Stores undo records for makeMove, in the form (move, piece, captured piece, en passant file
+        # before the move, value before the move, whether the moving side was in check, hash before the
+        # move, middlegame, endgame and phase before the move, halfmove clock before the move)
+        self.undoStack = []
+
+        # Hashes of the positions before each move played, for repetition detection
+        self.hashHistory = []
+
+        # Callbacks told about every move played through movePiece, see addMoveListener
+        self.moveListeners = []
+
+        # stores the game board and creates the pieces
+        if fen is None:
+            self.board = Chess.initializeGame()
+            self.initializePieces()
+        else:
+            self.loadFEN(fen)
+
+        # Stores the piece on each square, y * 8 + x, None for empty squares
+        self.indexPieces()
+
+        # Stores the squares each piece attacks, updated on every move
+        self.attackMap = AttackMap(self.board)
+        self.checkCheck()
+
+        # Zobrist hash identifying the position, updated on every move
+        self.hash = Zobrist.hashPosition(self)
+
+        # Piece-square table scores from white's view and the game phase, updated on every move
+        self.initializeEvaluation()
+
 
     def initializeGame() -> list:
         """
@@ -109,126 +154,467 @@ class Chess:
         # Place black king
         self.blackPieces.append(BlackKing(4, 0))
 
+        # Keep the kings at hand for check detection
+        self.whiteKing = self.whitePieces[-1]
+        self.blackKing = self.blackPieces[-1]
+
+
+    def indexPieces(self) -> None:
+        """
+        Fills the square to piece index and stores each piece's position in its piece list
+        """
+        self.squares = [None] * (Chess.BOARD_SIZE * Chess.BOARD_SIZE)
+
+        for pieces in (self.whitePieces, self.blackPieces):
+            for i, p in enumerate(pieces):
+                p.index = i
+                self.squares[p.y * Chess.BOARD_SIZE + p.x] = p
+
+
+    def initializeEvaluation(self) -> None:
+        """
+        Computes the middlegame and endgame piece-square table scores and the game phase from scratch
+        """
+        self.middlegame = 0
+        self.endgame = 0
+        self.phase = 0
+
+        for square, p in enumerate(self.squares):
+            if p is not None:
+                self.middlegame += PieceSquareTables.MIDDLEGAME[p.type + 6][square]
+                self.endgame += PieceSquareTables.ENDGAME[p.type + 6][square]
+                self.phase += PieceSquareTables.PHASE_WEIGHTS[abs(p.type)]
+
+
+    def evaluation(self) -> int:
+        """
+        Returns the static evaluation in centipawns from white's view: material plus the piece-square
+        table scores, blended from the middlegame to the endgame tables as pieces come off
+        """
+        phase = min(self.phase, PieceSquareTables.MAX_PHASE)
+        return self.value * 100 + (self.middlegame * phase + self.endgame * (PieceSquareTables.MAX_PHASE - phase)) // PieceSquareTables.MAX_PHASE
+
+
+    def fromFEN(fen : str) -> 'Chess':
+        """
+        Returns a game set up from a position in Forsyth-Edwards Notation
+        - fen: the position, such as 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1'
+        """
+        return Chess(fen=fen)
+
+
+    def loadFEN(self, fen : str) -> None:
+        """
+        Sets up the board, the pieces, the turn and the en passant state from a position in
+        Forsyth-Edwards Notation. Castling rights are ignored, castling is not part of the rules.
+        - fen: the position to load
+        """
+        fields = fen.split()
+        rows = fields[0].split('/')
+
+        if len(rows) != Chess.BOARD_SIZE:
+            raise ValueError('FEN must describe 8 rows: ' + fen)
+
+        self.board = []
+        self.whiteKing = None
+        self.blackKing = None
+
+        # Rows are listed from the top of the board, matching board[y]
+        for y, row in enumerate(rows):
+            boardRow = []
+
+            for letter in row:
+
+                # Digits are runs of empty squares
+                if letter.isdigit():
+                    boardRow.extend([0] * int(letter))
+                    continue
+
+                if letter not in Chess.FEN_PIECES:
+                    raise ValueError('Unknown piece ' + letter + ' in FEN: ' + fen)
+
+                # Create the piece and add its value
+                piece = PIECE_CLASSES[Chess.FEN_PIECES[letter]](len(boardRow), y)
+                boardRow.append(piece.type)
+                self.value += piece.value
+
+                if piece.type > 0:
+                    self.whitePieces.append(piece)
+                    if piece.type == PieceType.WHITEKING.value:
+                        self.whiteKing = piece
+                else:
+                    self.blackPieces.append(piece)
+                    if piece.type == PieceType.BLACKKING.value:
+                        self.blackKing = piece
+
+            if len(boardRow) != Chess.BOARD_SIZE:
+                raise ValueError('FEN row ' + row + ' does not have 8 squares: ' + fen)
+
+            self.board.append(boardRow)
+
+        if self.whiteKing is None or self.blackKing is None:
+            raise ValueError('FEN must have a king for each side: ' + fen)
+
+        # Side to move
+        self.whiteTurn = len(fields) < 2 or fields[1] == 'w'
+
+        # En passant target square, behind the pawn that moved two squares
+        if len(fields) > 3 and fields[3] != '-':
+            file = 'abcdefgh'.index(fields[3][0])
+
+            if fields[3][1] == '3':
+                self.twoWhitePawnMovement.add(file)
+            else:
+                self.twoBlackPawnMovement.add(file)
+
+        # Halfmove clock and move number
+        if len(fields) > 4:
+            self.halfMoveClock = int(fields[4])
+        if len(fields) > 5:
+            self.fullMoveNumber = int(fields[5])
+
+
+    def toFEN(self) -> str:
+        """
+        Returns the position in Forsyth-Edwards Notation. Castling is written as '-' since it is not
+        part of the rules.
+        """
+        letters = {value: letter for letter, value in Chess.FEN_PIECES.items()}
+        rows = []
+
+        for row in self.board:
+            text = ''
+            empty = 0
+
+            for piece in row:
+                if piece == 0:
+                    empty += 1
+                    continue
+
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                text += letters[piece]
+
+            if empty:
+                text += str(empty)
+            rows.append(text)
+
+        # En passant target square, behind the pawn that moved two squares
+        enPassant = '-'
+        for file in self.twoWhitePawnMovement:
+            enPassant = 'abcdefgh'[file] + '3'
+        for file in self.twoBlackPawnMovement:
+            enPassant = 'abcdefgh'[file] + '6'
+
+        return '{} {} - {} {} {}'.format('/'.join(rows), 'w' if self.whiteTurn else 'b', enPassant, self.halfMoveClock, self.fullMoveNumber)
 
 
-    def movePiece(self, oldX : int, oldY : int, move : tuple) -> None:
+    def movePiece(self, oldX : int, oldY : int, move : tuple) -> tuple:
         """
         Moves piece from one position to another. Should only be called when the piece
-        is available to be moved to the new position.
+        is available to be moved to the new position. Pawns reaching the last row promote to a queen.
         - oldX: old x position of piece to be moved
         - oldY: old y position of piece to be moved
         - move: tuple from function canMoveTo containing information about move
         """
 
-        # TODO for move piece, if pawn is second to back rank or if new reaches the end
-
         # Get piece information
         piece = self.board[oldY][oldX]
 
-        pieceClass = Piece();
-        pieceClassIndex = -1
-
-        # Get the piece class piece
-        if self.whiteTurn:
-            for i, p in enumerate(self.whitePieces):
-                if p.x == oldX and p.y == oldY:
-                    pieceClass = p
-                    pieceClassIndex = i
-
-        # Remove the white piece being captured from the list
-        else:
-            for i, p in enumerate(self.blackPieces):
-                if p.x == oldX and p.y == oldY:
-                    pieceClass = p
-                    pieceClassIndex = i
-
-        # Set the old piece position to empty
-        self.board[oldY][oldX] = 0
-
         # Get new movement piece information
         newX = move[0]
         newY = move[1]
         capture = move[2]
 
-        # Turn indicates the piece that was just moved, hasn't changed yet.
-        
-        # Check for en passant captures
+        flags = Move.CAPTURE if capture else 0
         enPassant = False
+        promotion = False
 
-        # Check for white en passant capture
-        if piece == PieceType.WHITEPAWN.value and newX in self.twoBlackPawnMovement and self.board[newY][newX] == 0 and capture:
+        # Pawn moves can be en passant captures, two square movements or promotions
+        if piece == PieceType.WHITEPAWN.value or piece == PieceType.BLACKPAWN.value:
 
-            # En passant occured
-            self.board[oldY][newX] = 0
-            enPassant = True
+            # Diagonal pawn moves to an empty square are en passant captures
+            if capture and self.board[newY][newX] == 0:
+                flags |= Move.EN_PASSANT
+                enPassant = True
 
-        # Check for black en passant capture
-        elif piece == PieceType.BLACKPAWN.value and newX in self.twoWhitePawnMovement and self.board[newY][newX] == 0 and capture :
+            elif abs(newY - oldY) == 2:
+                flags |= Move.TWO_SQUARE_PAWN
 
-            # En passant occured
-            self.board[oldY][newX] = 0
-            enPassant = True
+            # Check for promotion, promote to queen if found
+            promotion = newY == 0 or newY == Chess.BOARD_SIZE - 1
 
-        # A piece has been captured, remove it from the list of pieces
-        elif capture:
-            
-            # Get the piece being capture
-            pieceToCapture = self.board[newY][newX]
+        encoded = Move.encode(oldX, oldY, newX, newY, flags, PieceType.WHITEQUEEN.value if promotion else 0)
+        self.makeMove(encoded)
 
-            # Remove the black piece being captured from the list and update overall value
-            if self.whiteTurn:
+        # canMoveTo moves may leave the moving side in check, so check both kings
+        self.checkCheck()
+        check = self.whiteInCheck or self.blackInCheck
 
-                for i, p in enumerate(self.blackPieces):
-                    if p.x == newX and p.y == newY and p.type == pieceToCapture:
-                        self.value = self.value - self.blackPieces[i].value
-                        del self.blackPieces[i]
+        # Tell the listeners, if there are any
+        if self.moveListeners:
+            for listener in self.moveListeners:
+                listener(self, encoded, check, promotion, enPassant)
 
-            # Remove the white piece being captured from the list and update overall value
-            else:
+        # Return move information in form of (check, promotion, enPassant)
+        return (check, promotion, enPassant)
+
+
+    def addMoveListener(self, listener) -> None:
+        """
+        Registers a callback for the moves played through movePiece. It is called after each move as
+        listener(game, move, check, promotion, enPassant), with the move encoded by Move.encode and
+        the rest as returned by movePiece. Moves played with makeMove, such as during a search, are
+        not reported.
+        - listener: callable to register
+        """
+        self.moveListeners.append(listener)
+
+
+    def removeMoveListener(self, listener) -> None:
+        """
+        Unregisters a callback added with addMoveListener
+        - listener: callable to remove
+        """
+        self.moveListeners.remove(listener)
 
-                for i, p in enumerate(self.whitePieces):
-                    if p.x == newX and p.y == newY and p.type == pieceToCapture:
-                        self.value = self.value + self.blackPieces[i].value
-                        del self.whitePieces[i]
 
+    def makeMove(self, move : int) -> None:
+        """
+        Plays an encoded move from legalMoves and pushes an undo record so unmakeMove can take it back.
+        Updates the board, the piece lists, value, the en passant sets and the turn.
+        - move: move encoded by Move.encode
+        """
+        oldSquare = move & 63
+        newSquare = (move >> 6) & 63
+        oldX, oldY = oldSquare & 7, oldSquare >> 3
+        newX, newY = newSquare & 7, newSquare >> 3
+
+        white = self.whiteTurn
+        if white:
+            opponentPieces = self.blackPieces
+            enPassantFiles, opponentEnPassantFiles = self.twoWhitePawnMovement, self.twoBlackPawnMovement
+        else:
+            opponentPieces = self.whitePieces
+            enPassantFiles, opponentEnPassantFiles = self.twoBlackPawnMovement, self.twoWhitePawnMovement
+
+        # Get the piece class of the moving piece
+        squares = self.squares
+        pieceClass = squares[oldSquare]
+
+        # Remove the captured piece, en passant captures the pawn beside the moving pawn
+        captured = None
+        changed = (1 << oldSquare) | (1 << newSquare)
+        if move & Move.CAPTURE:
+            captureSquare = oldY * Chess.BOARD_SIZE + newX if move & Move.EN_PASSANT else newSquare
+            changed |= 1 << captureSquare
+
+            captured = squares[captureSquare]
+            squares[captureSquare] = None
+            self.board[captureSquare >> 3][newX] = 0
+
+            # Fill the captured piece's place in the list with the last piece
+            last = opponentPieces.pop()
+            if last is not captured:
+                opponentPieces[captured.index] = last
+                last.index = captured.index
+
+        # Store everything the move overwrites
+        previousEnPassant = opponentEnPassantFiles.pop() if opponentEnPassantFiles else -1
+        inCheck = self.whiteInCheck if white else self.blackInCheck
+        self.undoStack.append((move, pieceClass, captured, previousEnPassant, self.value, inCheck, self.hash, self.middlegame, self.endgame, self.phase, self.halfMoveClock))
+        self.hashHistory.append(self.hash)
+
+        # Captures and pawn moves can't be taken back, so no earlier position can repeat after them
+        if captured is not None or pieceClass.type == PieceType.WHITEPAWN.value or pieceClass.type == PieceType.BLACKPAWN.value:
+            self.halfMoveClock = 0
+        else:
+            self.halfMoveClock += 1
 
+        # Update the hash for the moving piece, the captured piece, the en passant file and the turn
+        key = self.hash ^ Zobrist.PIECES[pieceClass.type + 6][oldSquare] ^ Zobrist.BLACK_TURN
+        if captured is not None:
+            key ^= Zobrist.PIECES[captured.type + 6][captured.y * Chess.BOARD_SIZE + captured.x]
+        if previousEnPassant >= 0:
+            key ^= Zobrist.EN_PASSANT[previousEnPassant]
+        if move & Move.TWO_SQUARE_PAWN:
+            key ^= Zobrist.EN_PASSANT[newX]
 
         # Move piece
-        self.board[newY][newX] = piece
+        self.board[oldY][oldX] = 0
+        self.board[newY][newX] = pieceClass.type
         pieceClass.movePiece(newX, newY)
+        squares[oldSquare] = None
+        squares[newSquare] = pieceClass
+
+        # Update the evaluation by the change of each piece that moved or left the board
+        middlegameTable = PieceSquareTables.MIDDLEGAME[pieceClass.type + 6]
+        endgameTable = PieceSquareTables.ENDGAME[pieceClass.type + 6]
+        self.middlegame += middlegameTable[newSquare] - middlegameTable[oldSquare]
+        self.endgame += endgameTable[newSquare] - endgameTable[oldSquare]
+
+        if captured is not None:
+            self.value -= captured.value
+            self.middlegame -= PieceSquareTables.MIDDLEGAME[captured.type + 6][captureSquare]
+            self.endgame -= PieceSquareTables.ENDGAME[captured.type + 6][captureSquare]
+            self.phase -= PieceSquareTables.PHASE_WEIGHTS[abs(captured.type)]
+
+        # Promote the pawn in place by changing its class, no new piece is created
+        promotion = move >> Move.PROMOTION_SHIFT
+        if promotion:
+            self.value -= pieceClass.value
+            self.middlegame -= middlegameTable[newSquare]
+            self.endgame -= endgameTable[newSquare]
+
+            pieceClass.__class__ = PIECE_CLASSES[promotion if white else -promotion]
+            self.board[newY][newX] = pieceClass.type
+
+            self.value += pieceClass.value
+            self.middlegame += PieceSquareTables.MIDDLEGAME[pieceClass.type + 6][newSquare]
+            self.endgame += PieceSquareTables.ENDGAME[pieceClass.type + 6][newSquare]
+            self.phase += PieceSquareTables.PHASE_WEIGHTS[promotion]
+
+        self.hash = key ^ Zobrist.PIECES[pieceClass.type + 6][newSquare]
+
+        # Two square pawn movements allow en passant on the next move only
+        opponentEnPassantFiles.clear()
+        if move & Move.TWO_SQUARE_PAWN:
+            enPassantFiles.add(newX)
+
+        # Update the attacks, a legal move never leaves the moving side in check
+        self.attackMap.update(changed)
+        if white:
+            self.whiteInCheck = False
+            self.blackInCheck = self.isSquareAttacked(self.blackKing.x, self.blackKing.y, True)
+        else:
+            self.blackInCheck = False
+            self.whiteInCheck = self.isSquareAttacked(self.whiteKing.x, self.whiteKing.y, False)
+
+        # Set other player turn
+        self.whiteTurn = not white
+        if not white:
+            self.fullMoveNumber += 1
 
-        # Check for promotion, promote to queen if found
-        promotion = False
-        if piece == PieceType.WHITEPAWN.value and newY == 0:
-            self.board[newY][newX] = PieceType.WHITEQUEEN.value
-            self.whitePieces[pieceClassIndex] = WhiteQueen(x=newX, y=newY)
-            promotion = True
-        if piece == PieceType.BLACKPAWN.value and newY == 7:
-            self.board[newY][newX] = piece
-            self.blackPieces[pieceClassIndex] = BlackQueen(x=newX, y=newY)
-            promotion = True
 
-        # TODO Check for check
-        check = False
+    def unmakeMove(self) -> None:
+        """
+        Takes back the last move played with makeMove, restoring the position from the undo record
+        """
+        move, pieceClass, captured, previousEnPassant, previousValue, inCheck, self.hash, self.middlegame, self.endgame, self.phase, self.halfMoveClock = self.undoStack.pop()
+        self.hashHistory.pop()
+
+        oldSquare = move & 63
+        newSquare = (move >> 6) & 63
+        oldX, oldY = oldSquare & 7, oldSquare >> 3
+        newX, newY = newSquare & 7, newSquare >> 3
+
+        # Turn goes back to the player who made the move
+        white = not self.whiteTurn
+        self.whiteTurn = white
+        if not white:
+            self.fullMoveNumber -= 1
+        if white:
+            opponentPieces = self.blackPieces
+            enPassantFiles, opponentEnPassantFiles = self.twoWhitePawnMovement, self.twoBlackPawnMovement
+        else:
+            opponentPieces = self.whitePieces
+            enPassantFiles, opponentEnPassantFiles = self.twoBlackPawnMovement, self.twoWhitePawnMovement
+
+        # A promoted piece turns back into a pawn
+        if move >> Move.PROMOTION_SHIFT:
+            pieceClass.__class__ = WhitePawn if white else BlackPawn
+
+        # Move the piece back
+        squares = self.squares
+        self.board[newY][newX] = 0
+        self.board[oldY][oldX] = pieceClass.type
+        pieceClass.movePiece(oldX, oldY)
+        squares[newSquare] = None
+        squares[oldSquare] = pieceClass
+
+        # Put the captured piece back in its place, the piece that filled it goes back to the end
+        changed = (1 << oldSquare) | (1 << newSquare)
+        if captured is not None:
+            if captured.index < len(opponentPieces):
+                last = opponentPieces[captured.index]
+                last.index = len(opponentPieces)
+                opponentPieces.append(last)
+                opponentPieces[captured.index] = captured
+            else:
+                opponentPieces.append(captured)
+
+            captureSquare = captured.y * Chess.BOARD_SIZE + captured.x
+            self.board[captured.y][captured.x] = captured.type
+            squares[captureSquare] = captured
+            changed |= 1 << captureSquare
+
+        # Restore the attacks and check state from before the move
+        self.attackMap.update(changed)
+        if white:
+            self.whiteInCheck = inCheck
+            self.blackInCheck = False
+        else:
+            self.blackInCheck = inCheck
+            self.whiteInCheck = False
 
-        print(self.value)
+        # Restore the en passant state from before the move
+        enPassantFiles.clear()
+        if previousEnPassant >= 0:
+            opponentEnPassantFiles.add(previousEnPassant)
 
-        # Check for white en passant values
-        if piece == PieceType.WHITEPAWN.value and (oldY - newY) == 2:
-            self.twoWhitePawnMovement.add(newX)
+        self.value = previousValue
 
-        # Check for black en passant values
-        elif piece == PieceType.BLACKPAWN.value and (newY - oldY) == 2:
-            self.twoBlackPawnMovement.add(newX)
 
-        # TODO Check for check
+    def repetitions(self) -> int:
+        """
+        Returns how many times the current position occurred before. Only positions with the same
+        side to move since the last capture or pawn move are compared, no earlier one can repeat.
+        """
+        history = self.hashHistory
+        count = 0
 
-        # Set other player turn
-        self.whiteTurn = not self.whiteTurn
-        print('PROMO FROM CHESS' , promotion)
+        # Positions with the same side to move are two plies apart
+        for i in range(len(history) - 2, len(history) - 1 - min(self.halfMoveClock, len(history)), -2):
+            if history[i] == self.hash:
+                count += 1
 
-        # Return move information in form of (check, promotion, enPassant)
-        return (check, promotion, enPassant)
+        return count
+
+
+    def isRepetition(self) -> bool:
+        """
+        Returns True if the current position occurred before, the draw test used inside a search
+        """
+        history = self.hashHistory
+
+        for i in range(len(history) - 2, len(history) - 1 - min(self.halfMoveClock, len(history)), -2):
+            if history[i] == self.hash:
+                return True
+
+        return False
+
+
+    def isThreefoldRepetition(self) -> bool:
+        """
+        Returns True if the current position occurred at least twice before
+        """
+        return self.repetitions() >= 2
+
+
+    def isFiftyMoveDraw(self) -> bool:
+        """
+        Returns True if fifty moves by each side were played without a capture or pawn move
+        """
+        return self.halfMoveClock >= 100
+
+
+    def isDraw(self) -> bool:
+        """
+        Returns True if the game is drawn by threefold repetition or the fifty-move rule. Stalemate
+        is left to the caller, who has the legal moves at hand.
+        """
+        return self.halfMoveClock >= 100 or self.isThreefoldRepetition()
 
     
     def canMoveTo(self, x : int, y : int) -> list:
@@ -239,111 +625,237 @@ class Chess:
         # Get the piece
         piece = self.board[y][x]
 
-        # Set up the movement availability
-        # Formatted as touple. (x to move to, y to move to, boolean true if piece capture)
-        positions = []
+        if piece == 0:
+            return None
 
-        #
-        # TODO Pawn promotions
-        # TODO Castling
-        # TODO Check : seperate function, checks squares around the king to determine if attacked
-        # 
+        # Only the side to move can move
+        if (piece > 0) != self.whiteTurn:
+            return []
 
+        # Formatted as touple. (x to move to, y to move to, boolean true if piece capture)
+        return MOVE_GENERATORS[piece](x, y, self)
 
-        # Get the available positions to move
-        if piece == 0:
-            return None
-        
-        # White turn, only white can move
-        elif self.whiteTurn:
-            
-            # White pawn movement positions
-            if piece ==  PieceType.WHITEPAWN.value:
 
-                return WhitePawn.canMoveTo(x, y, self)
+    def legalMoves(self) -> list:
+        """
+        Returns a list of every legal move for the side to move, encoded as Move integers
+        """
+        return list(self.generateMoves())
 
 
-            # White Knight movement positions
-            elif piece ==  PieceType.WHITEKNIGHT.value:
+    def generateMoves(self):
+        """
+        Yields every legal move for the side to move, encoded as Move integers. Moves come from one
+        pass over the pieces of the side to move, and moves leaving its own king attacked are skipped.
+        Pawns reaching the last row yield one move for each promotion piece.
+        """
+        return self.encodeMoves(self.pseudoMoves())
+
 
-                return WhiteKnight.canMoveTo(x, y, self)
+    def pseudoMoves(self) -> list:
+        """
+        Returns every move of the side to move in the form (oldX, oldY, (x, y, capture)), including
+        moves that leave its own king attacked. encodeMoves filters and encodes them.
+        """
+        # Ask the move generator of each piece of the side to move
+        pieces = self.whitePieces if self.whiteTurn else self.blackPieces
+        generators = MOVE_GENERATORS
+        return [(p.x, p.y, position) for p in pieces for position in generators[p.type](p.x, p.y, self)]
 
 
-            # White Bishop movement positions
-            elif piece == PieceType.WHITEBISHOP.value:
+    def tacticalMoves(self) -> list:
+        """
+        Returns the captures, en passant captures and promotions of the side to move, in the form
+        of pseudoMoves
+        """
+        pieces = self.whitePieces if self.whiteTurn else self.blackPieces
+        generators = TACTICAL_GENERATORS
+        return [(p.x, p.y, position) for p in pieces for position in generators[p.type](p.x, p.y, self)]
 
-                return WhiteBishop.canMoveTo(x, y, self)
 
+    def quietMoves(self) -> list:
+        """
+        Returns the moves of the side to move that tacticalMoves leaves out, in the form of pseudoMoves
+        """
+        pieces = self.whitePieces if self.whiteTurn else self.blackPieces
+        generators = QUIET_GENERATORS
+        return [(p.x, p.y, position) for p in pieces for position in generators[p.type](p.x, p.y, self)]
 
-            # White Rook movement positions
-            elif piece == PieceType.WHITEROOK.value:
 
-                return WhiteRook.canMoveTo(x, y, self)
+    def isLegal(self, move : int) -> bool:
+        """
+        Returns True if an encoded move, such as a move from the transposition table, is legal in
+        the position. Only the moves of the piece on the move's square are generated.
+        - move: move encoded by Move.encode
+        """
+        oldSquare = move & 63
+        oldX, oldY = oldSquare & 7, oldSquare >> 3
+        piece = self.board[oldY][oldX]
 
+        if piece == 0 or (piece > 0) != self.whiteTurn:
+            return False
 
-            # Whtie Queen movement positions
-            elif piece == PieceType.WHITEQUEEN.value:
+        return move in self.encodeMoves([(oldX, oldY, position) for position in self.canMoveTo(oldX, oldY)])
 
-                return WhiteQueen.canMoveTo(x, y, self)
 
+    def encodeMoves(self, candidates):
+        """
+        Yields the legal moves among pseudoMoves moves, encoded as Move integers. Moves leaving the
+        king of the side to move attacked are skipped.
+        - candidates: moves in the form (oldX, oldY, (x, y, capture)) for the side to move
+        """
 
-            # White King movement positions
-            elif piece == PieceType.WHITEKING.value:
+        # Out of check, only king moves, en passant and attacked pieces in line with the king can expose it
+        white = self.whiteTurn
+        king = self.whiteKing if white else self.blackKing
+        kingX, kingY = king.x, king.y
+        inCheck = self.whiteInCheck if white else self.blackInCheck
+        attacked = self.attackMap.attackedBy(not white)
 
-                return WhiteKing.canMoveTo(x, y, self)
+        for oldX, oldY, position in candidates:
 
+            newX, newY, capture = position
+            piece = self.board[oldY][oldX]
+            flags = Move.CAPTURE if capture else 0
 
-        # Black turn, only black can move
-        else:
-            
-            # Black pawn movement positions
-            if piece ==  PieceType.BLACKPAWN.value:
+            # Skip moves that leave the king attacked
+            if inCheck or (capture and self.board[newY][newX] == 0):
+                if not self.isLegalMove(oldX, oldY, position):
+                    continue
 
-                return BlackPawn.canMoveTo(x, y, self)
+            # The king can't move to an attacked square
+            elif oldX == kingX and oldY == kingY:
+                if (attacked >> (newY * Chess.BOARD_SIZE + newX)) & 1:
+                    continue
 
+            # Attacked pieces in line with the king might be pinned
+            elif (attacked >> (oldY * Chess.BOARD_SIZE + oldX)) & 1 and (oldX == kingX or oldY == kingY or abs(oldX - kingX) == abs(oldY - kingY)):
+                if not self.isLegalMove(oldX, oldY, position):
+                    continue
 
-            # Black Knight movement positions
-            elif piece ==  PieceType.BLACKKNIGHT.value:
+            # Pawn moves carry en passant, two square and promotion information
+            if piece == PieceType.WHITEPAWN.value or piece == PieceType.BLACKPAWN.value:
 
-                return BlackKnight.canMoveTo(x, y, self)
+                # Diagonal pawn moves to an empty square are en passant captures
+                if capture and self.board[newY][newX] == 0:
+                    flags |= Move.EN_PASSANT
 
+                elif abs(newY - oldY) == 2:
+                    flags |= Move.TWO_SQUARE_PAWN
 
-            # Black Bishop movement positions
-            elif piece == PieceType.BLACKBISHOP.value:
+                # Pawn reached the last row, one move per promotion piece
+                if newY == 0 or newY == Chess.BOARD_SIZE - 1:
+                    for promotion in Move.PROMOTIONS:
+                        yield Move.encode(oldX, oldY, newX, newY, flags, promotion)
+                    continue
 
-                return BlackBishop.canMoveTo(x, y, self)
+            yield Move.encode(oldX, oldY, newX, newY, flags)
 
 
-            # Black Rook movement positions
-            elif piece == PieceType.BLACKROOK.value:
+    def isLegalMove(self, oldX : int, oldY : int, position : tuple) -> bool:
+        """
+        Returns True if a move from canMoveTo does not leave the moving side's king attacked.
+        The move is played on the board, tested and taken back.
+        - oldX: x position of the piece to be moved
+        - oldY: y position of the piece to be moved
+        - position: tuple from function canMoveTo containing information about move
+        """
+        newX, newY, capture = position
+        piece = self.board[oldY][oldX]
+        captured = self.board[newY][newX]
+        white = piece > 0
 
-                return BlackRook.canMoveTo(x, y, self)
+        # Pawns capturing onto an empty square are capturing en passant
+        enPassant = capture and captured == 0 and (piece == PieceType.WHITEPAWN.value or piece == PieceType.BLACKPAWN.value)
 
+        # Play the move on the board
+        self.board[oldY][oldX] = 0
+        self.board[newY][newX] = piece
+        if enPassant:
+            enPassantPawn = self.board[oldY][newX]
+            self.board[oldY][newX] = 0
 
-            # Black Queen movement positions
-            elif piece == PieceType.BLACKQUEEN.value:
+        # Determine where the king ends up
+        if piece == PieceType.WHITEKING.value or piece == PieceType.BLACKKING.value:
+            kingX, kingY = newX, newY
+        else:
+            king = self.whiteKing if white else self.blackKing
+            kingX, kingY = king.x, king.y
 
-                return BlackQueen.canMoveTo(x, y, self)
+        attacked = self.scanSquareAttacked(kingX, kingY, not white)
 
+        # Take the move back
+        if enPassant:
+            self.board[oldY][newX] = enPassantPawn
+        self.board[newY][newX] = captured
+        self.board[oldY][oldX] = piece
 
-            # Black King movement positions
-            elif piece == PieceType.BLACKKING.value:
+        return not attacked
 
-                return BlackKing.canMoveTo(x, y, self)
 
+    def isSquareAttacked(self, x : int, y : int, byWhite : bool) -> bool:
+        """
+        Returns True if a square is attacked by any piece of one side, read from the attack map
+        - x: x position of the square
+        - y: y position of the square
+        - byWhite: True to look for white attackers, False for black attackers
+        """
+        return (self.attackMap.attackedBy(byWhite) >> (y * Chess.BOARD_SIZE + x)) & 1 == 1
 
 
-        # print(positions)
-        return positions
+    def scanSquareAttacked(self, x : int, y : int, byWhite : bool) -> bool:
+        """
+        Returns True if a square is attacked by any piece of one side. Looks outward from the square
+        with squareAttacked, so it also works while a move is being tried on the board without
+        updating the attack map.
+        - x: x position of the square
+        - y: y position of the square
+        - byWhite: True to look for white attackers, False for black attackers
+        """
+        return squareAttacked(self.board, x, y, byWhite)
 
         
     def checkCheck(self):
         """
-        Determines whether check is given, called after every move
+        Determines whether check is given, setting whiteInCheck and blackInCheck from the attack map
         """
+        self.whiteInCheck = self.isSquareAttacked(self.whiteKing.x, self.whiteKing.y, False)
+        self.blackInCheck = self.isSquareAttacked(self.blackKing.x, self.blackKing.y, True)
 
-        # Black turn, check white for check
-        
+
+
+    def memoryFootprint(self) -> int:
+        """
+        Returns the bytes used by the position: the game object and everything it references, each
+        object counted once. Classes, modules and the cached small ints shared by every game are left out.
+        """
+        seen = set()
+        pending = [self]
+        total = 0
+
+        while pending:
+            obj = pending.pop()
+
+            if id(obj) in seen or isinstance(obj, type) or (type(obj) is int and -5 <= obj <= 256):
+                continue
+            seen.add(id(obj))
+            total += sys.getsizeof(obj)
+
+            # Follow the references held by the object
+            if isinstance(obj, dict):
+                pending.extend(obj.keys())
+                pending.extend(obj.values())
+            elif isinstance(obj, (list, tuple, set, frozenset)):
+                pending.extend(obj)
+
+            if hasattr(obj, '__dict__'):
+                pending.append(obj.__dict__)
+            for cls in type(obj).__mro__:
+                for slot in cls.__dict__.get('__slots__', ()):
+                    if hasattr(obj, slot):
+                        pending.append(getattr(obj, slot))
+
+        return total
 
 
     def printBoard(self):
@@ -402,866 +914,428 @@ class Chess:
 
 
 
-class Piece:
+def coordinateTable(table : list) -> list:
     """
-    Defines the componenets of a piece needed for inheritance for other pieces
+    Returns a Bitboard table of target square indexes for each square as (x, y) targets
     """
-    def __init__(self) -> None:
-        
-        self.type = 0
-        self.value = 0
-        self.x = -1
-        self.y = -1
+    return [[(target % Chess.BOARD_SIZE, target // Chess.BOARD_SIZE) for target in targets] for targets in table]
 
-    def canMoveTo(x : int, y : int, game : Chess) -> list:
-        """
-        Defines where a piece can to, implement in each subclass
-        """
-        raise NotImplementedError
 
-    def movePiece(self, x : int, y : int) -> None:
+def coordinateRays(table : list) -> list:
+    """
+    Returns a Bitboard table of rays of square indexes for each square as rays of (x, y) squares
+    """
+    return [[[(target % Chess.BOARD_SIZE, target // Chess.BOARD_SIZE) for target in ray] for ray in rays] for rays in table]
 
-        self.x = x
-        self.y = y
 
-    def printPiece(self):
-        print('type', self.type, ', (', self.x, ', ', self.y, ')')
+# Squares a piece on each square y * 8 + x can reach as (x, y) squares, in the order their moves
+# are generated, taken from the square tables of Bitboard.
+# White pawns move up the board towards y = 0, black pawns down towards y = 7.
+KNIGHT_TARGETS = coordinateTable(KNIGHT_SQUARES)
+KING_TARGETS = coordinateTable(KING_SQUARES)
+WHITE_PAWN_CAPTURES = coordinateTable(WHITE_PAWN_SQUARES)
+BLACK_PAWN_CAPTURES = coordinateTable(BLACK_PAWN_SQUARES)
+ROOK_RAYS = coordinateRays(ROOK_SQUARES)
+BISHOP_RAYS = coordinateRays(BISHOP_SQUARES)
+QUEEN_RAYS = coordinateRays(QUEEN_SQUARES)
 
-    def __str__(self):
-        return 'Piece: ' + str(self.type) + '(' + str(self.x) + ', ' + str(self.y) + ')'
 
-class WhitePawn(Piece):
+
+
+def squareAttacked(board : list, x : int, y : int, byWhite : bool) -> bool:
     """
-    White Pawn
+    Returns True if a square is attacked by any piece of one side, looking outward from the square
+    for knights, kings, pawns and sliding pieces
+    - board: PieceType values indexed board[y][x]
+    - x: x position of the square
+    - y: y position of the square
+    - byWhite: True to look for white attackers, False for black attackers
     """
-    def __init__(self, x, y) -> None:
+    sign = 1 if byWhite else -1
+    square = y * Chess.BOARD_SIZE + x
+
+    # Knight attacks
+    knight = sign * PieceType.WHITEKNIGHT.value
+    for newX, newY in KNIGHT_TARGETS[square]:
+        if board[newY][newX] == knight:
+            return True
+
+    # King attacks
+    king = sign * PieceType.WHITEKING.value
+    for newX, newY in KING_TARGETS[square]:
+        if board[newY][newX] == king:
+            return True
+
+    # Pawn attacks, white pawns attack upwards so they sit one row below the square
+    pawn = sign * PieceType.WHITEPAWN.value
+    pawnY = y + sign
+    if pawnY >= 0 and pawnY < Chess.BOARD_SIZE:
+        if (x > 0 and board[pawnY][x - 1] == pawn) or (x < Chess.BOARD_SIZE - 1 and board[pawnY][x + 1] == pawn):
+            return True
+
+    # Sliding attacks, walk each ray up to the first piece
+    queen = sign * PieceType.WHITEQUEEN.value
+    rook = sign * PieceType.WHITEROOK.value
+    bishop = sign * PieceType.WHITEBISHOP.value
+
+    for rays, slider in ((ROOK_RAYS[square], rook), (BISHOP_RAYS[square], bishop)):
+        for ray in rays:
+            for newX, newY in ray:
+                landingSquare = board[newY][newX]
+
+                if landingSquare != 0:
+                    if landingSquare == slider or landingSquare == queen:
+                        return True
+                    break
 
-        self.type = PieceType.WHITEPAWN.value
-        self.value = 1
-        self.x = x
-        self.y = y
-        
-    def canMoveTo(x : int, y : int, game : Chess) -> list:
-        """
-        Defines all of the squares that
-        """
+    return False
 
-        # Set up positions that pawn can move to
-        positions = []
 
-        # Pawns can move forward once at any time if nothing blocking it's path
-        if game.board[y - 1][x] == 0:
-            positions.append((x, y - 1, False))
+def pawnGenerator(white : bool, tactical : bool = True, quiet : bool = True):
+    """
+    Returns the move generator of the pawns of one colour. White pawns move up the board towards
+    y = 0, black pawns down towards y = 7. Captures, en passant and pushes to the last row are
+    tactical moves, the other pushes are quiet moves.
+    - white: True for white pawns, False for black pawns
+    - tactical: True to generate the tactical moves
+    - quiet: True to generate the quiet moves
+    """
+    step = -1 if white else 1
+    startRow = 6 if white else 1
+    enPassantRow = 3 if white else 4
+    promotionRow = 0 if white else Chess.BOARD_SIZE - 1
+    captures = WHITE_PAWN_CAPTURES if white else BLACK_PAWN_CAPTURES
+
+    def canMoveTo(x : int, y : int, game : Chess) -> list:
 
-        # Determine regular capture movements
-        potentialPositions = [(x - 1, y - 1), (x + 1, y - 1)]
+        board = game.board
 
-        for position in potentialPositions:
-            # Determine if capture is in bounds
-            if position[0] >= 0 and position[1] >= 0 and position[0] < Chess.BOARD_SIZE and position[1] < Chess.BOARD_SIZE:
+        # Define positions the pawn can move to
+        positions = []
 
-                # Determine if piece in capture square is black
-                if game.board[position[1]][position[0]] < 0:
-                    positions.append((position[0], position[1], True))
+        # Pawns can move forward once at any time if nothing blocking it's path, a tactical move
+        # when it promotes
+        if board[y + step][x] == 0 and (tactical if y + step == promotionRow else quiet):
+            positions.append((x, y + step, False))
 
-        # Determine en passant capture movements
+        if tactical:
 
-        # Check left en passant
-        if (x - 1) in game.twoBlackPawnMovement and y == 3:
-            # Left en passant possible, append as capture
-            positions.append((x - 1, y - 1, True))
+            # Determine regular capture movements, capture if the square holds an opponent piece
+            for newX, newY in captures[y * Chess.BOARD_SIZE + x]:
+                landingSquare = board[newY][newX]
+                if landingSquare != 0 and (landingSquare < 0) == white:
+                    positions.append((newX, newY, True))
 
-        # Check right en passant
-        if (x + 1) in game.twoBlackPawnMovement and y == 3:
-            # Right en passant possible, append as capture
-            positions.append((x + 1, y - 1, True))
-        
+            # Determine en passant capture movements, next to an opponent pawn that just moved two squares
+            if y == enPassantRow:
+                for file in (game.twoBlackPawnMovement if white else game.twoWhitePawnMovement):
+                    if file == x - 1 or file == x + 1:
+                        positions.append((file, y + step, True))
 
         # Pawns can move forward twice if hasnt moved and nothing blocking it's path
-        if y == 6 and game.board[y - 2][x] == 0:
-            positions.append((x, y - 2, False))
+        if quiet and y == startRow and board[y + step][x] == 0 and board[y + 2 * step][x] == 0:
+            positions.append((x, y + 2 * step, False))
 
         return positions
-    
 
+    return canMoveTo
 
-class WhiteKnight(Piece):
+
+def stepGenerator(targets : list, white : bool, tactical : bool = True, quiet : bool = True):
     """
-    White Knight
+    Returns the move generator of a piece moving one step to fixed squares, the knight or the king.
+    Captures are tactical moves, moves to empty squares are quiet moves.
+    - targets: table of (x, y) targets for each square, KNIGHT_TARGETS or KING_TARGETS
+    - white: True for white pieces, False for black pieces
+    - tactical: True to generate the captures
+    - quiet: True to generate the moves to empty squares
     """
-    def __init__(self, x, y) -> None:
 
-        self.type = PieceType.WHITEKNIGHT.value
-        self.value = 3
-        self.x = x
-        self.y = y
- 
     def canMoveTo(x : int, y : int, game : Chess) -> list:
 
-        # Define movment options the knight can go to
+        board = game.board
+
+        # Land on empty squares and opponent pieces, capturing the opponent pieces
         positions = []
+        for newX, newY in targets[y * Chess.BOARD_SIZE + x]:
+            landingSquare = board[newY][newX]
+
+            if landingSquare == 0:
+                positions.append((newX, newY, False))
+            elif (landingSquare < 0) == white:
+                positions.append((newX, newY, True))
+
+        return positions
 
-        # Define positions for knight to move (to add to existing x and y values)
-        potentialPositions = [(-1, -2), (1, -2), (-2, -1), (-2, 1), (-1, 2), (1, 2), (2, 1), (2, -1)]
+    def canCaptureOn(x : int, y : int, game : Chess) -> list:
 
-        # Determine where the knight can move
-        for move in potentialPositions:
-            # Move must be in bounds of the board
-            if x + move[0] >= 0 and y + move[1] >= 0 and x + move[0] < Chess.BOARD_SIZE and y + move[1] < Chess.BOARD_SIZE:
-                
-                # Move cannot land on a white piece
-                landingSquare = game.board[y + move[1]][x + move[0]]
+        board = game.board
 
-                if landingSquare <= 0:
+        # Land on opponent pieces only
+        positions = []
+        for newX, newY in targets[y * Chess.BOARD_SIZE + x]:
+            landingSquare = board[newY][newX]
 
-                    # Knight capturing piece
-                    if landingSquare < 0:
-                        positions.append((x + move[0], y + move[1], True))
-                    # Knight not capturing piece
-                    else:
-                        positions.append((x + move[0], y + move[1], False))
+            if landingSquare != 0 and (landingSquare < 0) == white:
+                positions.append((newX, newY, True))
 
         return positions
-    
 
+    def canStepTo(x : int, y : int, game : Chess) -> list:
 
-class WhiteBishop(Piece):
+        board = game.board
+
+        # Land on empty squares only
+        return [(newX, newY, False) for newX, newY in targets[y * Chess.BOARD_SIZE + x] if board[newY][newX] == 0]
+
+    if tactical and quiet:
+        return canMoveTo
+    return canCaptureOn if tactical else canStepTo
+
+
+def slidingGenerator(rays : list, white : bool, tactical : bool = True, quiet : bool = True):
     """
-    White Bishop
+    Returns the move generator of a sliding piece, the bishop, rook or queen. Captures are tactical
+    moves, moves to empty squares are quiet moves.
+    - rays: table of rays for each square, BISHOP_RAYS, ROOK_RAYS or QUEEN_RAYS
+    - white: True for white pieces, False for black pieces
+    - tactical: True to generate the captures
+    - quiet: True to generate the moves to empty squares
     """
-    def __init__(self, x, y) -> None:
-
-        self.type = PieceType.WHITEBISHOP.value
-        self.value = 3
-        self.x = x
-        self.y = y
- 
 
     def canMoveTo(x : int, y : int, game : Chess) -> list:
 
-        # Define positions white can mvoe to
+        board = game.board
+
+        # Walk each ray outward. Append and keep going if the square is empty, append and stop
+        # on an opponent piece, stop on an own piece
         positions = []
+        for ray in rays[y * Chess.BOARD_SIZE + x]:
+            for newX, newY in ray:
+                landingSquare = board[newY][newX]
 
-        # Determine the up right movement positions
-        for i in range(1, 8):
+                if landingSquare == 0:
+                    positions.append((newX, newY, False))
+                else:
+                    if (landingSquare < 0) == white:
+                        positions.append((newX, newY, True))
+                    break
 
-            # Set up the new x and new y variables
-            newX = x + i
-            newY = y - i
-            
-            # Determine if the up right movement is not in bounds, break loop
-            if not(newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE):
-                break
+        return positions
 
-            # In bounds, keep adding if sqares are empty. Add if black then stop, stop if white
-            landingSquare = game.board[newY][newX]
+    def canCaptureOn(x : int, y : int, game : Chess) -> list:
 
-            # Square is empty, append and keep going, no capture
-            if landingSquare == 0:
-                positions.append((newX, newY, False))
+        board = game.board
 
-            # Square is black square, append and stop going, capture
-            elif landingSquare < 0:
-                positions.append((newX, newY, True))
-                break
+        # Walk each ray outward to its first piece, appending it if it's an opponent piece
+        positions = []
+        for ray in rays[y * Chess.BOARD_SIZE + x]:
+            for newX, newY in ray:
+                landingSquare = board[newY][newX]
 
-            # Square is white square, no new move and stop going
-            else:
-                break
+                if landingSquare != 0:
+                    if (landingSquare < 0) == white:
+                        positions.append((newX, newY, True))
+                    break
 
-        # Determine the up left movement positions
-        for i in range(1, 8):
+        return positions
 
-            # Set up the new x and new y variables
-            newX = x - i
-            newY = y - i
-            
-            # Determine if the up left movement is not in bounds, break loop
-            if not(newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE):
-                break
+    def canSlideTo(x : int, y : int, game : Chess) -> list:
 
-            # In bounds, keep adding if sqares are empty. Add if black then stop, stop if white
-            landingSquare = game.board[newY][newX]
+        board = game.board
 
-            # Square is empty, append and keep going, no capture
-            if landingSquare == 0:
+        # Walk each ray outward, appending the empty squares before its first piece
+        positions = []
+        for ray in rays[y * Chess.BOARD_SIZE + x]:
+            for newX, newY in ray:
+                if board[newY][newX] != 0:
+                    break
                 positions.append((newX, newY, False))
 
-            # Square is black square, append and stop going, capture
-            elif landingSquare < 0:
-                positions.append((newX, newY, True))
-                break
+        return positions
 
-            # Square is white square, no new move and stop going
-            else:
-                break
+    if tactical and quiet:
+        return canMoveTo
+    return canCaptureOn if tactical else canSlideTo
 
-        # Determine the down left movement positions
-        for i in range(1, 8):
 
-            # Set up the new x and new y variables
-            newX = x - i
-            newY = y + i
-            
-            # Determine if the down left movement is not in bounds, break loop
-            if not(newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE):
-                break
+def buildGenerators(tactical : bool, quiet : bool) -> dict:
+    """
+    Returns the move generators of every piece, indexed by PieceType value
+    - tactical: True to generate captures, en passant and promotions
+    - quiet: True to generate the other moves
+    """
+    generators = {}
+    for white, sign in ((True, 1), (False, -1)):
+        generators[sign * PieceType.WHITEPAWN.value] = pawnGenerator(white, tactical, quiet)
+        generators[sign * PieceType.WHITEKNIGHT.value] = stepGenerator(KNIGHT_TARGETS, white, tactical, quiet)
+        generators[sign * PieceType.WHITEBISHOP.value] = slidingGenerator(BISHOP_RAYS, white, tactical, quiet)
+        generators[sign * PieceType.WHITEROOK.value] = slidingGenerator(ROOK_RAYS, white, tactical, quiet)
+        generators[sign * PieceType.WHITEQUEEN.value] = slidingGenerator(QUEEN_RAYS, white, tactical, quiet)
+        generators[sign * PieceType.WHITEKING.value] = stepGenerator(KING_TARGETS, white, tactical, quiet)
+    return generators
 
-            # In bounds, keep adding if sqares are empty. Add if black then stop, stop if white
-            landingSquare = game.board[newY][newX]
 
-            # Square is empty, append and keep going, no capture
-            if landingSquare == 0:
-                positions.append((newX, newY, False))
+# Move generator of every piece, indexed by PieceType value. Each takes (x, y, game) and returns
+# the (x, y, capture) positions the piece on (x, y) can move to, including moves into check.
+# TACTICAL_GENERATORS only return captures, en passant and promotions, QUIET_GENERATORS the rest.
+# TODO Castling
+MOVE_GENERATORS = buildGenerators(True, True)
+TACTICAL_GENERATORS = buildGenerators(True, False)
+QUIET_GENERATORS = buildGenerators(False, True)
 
-            # Square is black square, append and stop going, capture
-            elif landingSquare < 0:
-                positions.append((newX, newY, True))
-                break
 
-            # Square is white square, no new move and stop going
-            else:
-                break
-
-        # Determine the down right movement positions
-        for i in range(1, 8):
-
-            # Set up the new x and new y variables
-            newX = x + i
-            newY = y + i
-            
-            # Determine if the down right movement is not in bounds, break loop
-            if not(newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE):
-                break
-
-            # In bounds, keep adding if sqares are empty. Add if black then stop, stop if white
-            landingSquare = game.board[newY][newX]
-
-            # Square is empty, append and keep going, no capture
-            if landingSquare == 0:
-                positions.append((newX, newY, False))
-
-            # Square is black square, append and stop going, capture
-            elif landingSquare < 0:
-                positions.append((newX, newY, True))
-                break
-
-            # Square is white square, no new move and stop going
-            else:
-                break
-        
-
-        return positions
-    
 
 
-class WhiteRook(Piece):
+class Piece:
     """
-    White Rook
+    Defines the componenets of a piece needed for inheritance for other pieces. Type and value are
+    class attributes and the position is kept in slots, so a piece object has no __dict__.
     """
-    def __init__(self, x, y) -> None:
+    __slots__ = ('x', 'y', 'index')
+
+    type = 0
+    value = 0
+
+    def __init__(self, x : int = -1, y : int = -1) -> None:
 
-        self.type = PieceType.WHITEROOK.value
-        self.value = 5
         self.x = x
         self.y = y
- 
 
-    def canMoveTo(x : int, y : int, game : Chess) -> list:
-
-        # Define positions that rook can move to
-        positions = []
+        # Position of the piece in its Chess piece list, set by Chess.indexPieces
+        self.index = -1
 
-        # Determine left move positions
-        for i in range(1, 8):
+    def canMoveTo(x : int, y : int, game : Chess) -> list:
+        """
+        Defines where a piece can to, each subclass uses its generator from MOVE_GENERATORS
+        """
+        raise NotImplementedError
 
-            # Determine if the movement is in bounds
-            newX = x - i
+    def movePiece(self, x : int, y : int) -> None:
 
-            if newX >= 0 and newX < Chess.BOARD_SIZE:
+        self.x = x
+        self.y = y
 
-                # Determine movement options. Append and keep going if square is 0, append and stop if black, stop if white
-                landingSquare = game.board[y][newX]
-                
-                # Square is empty, append and keep going, no capture
-                if landingSquare == 0:
-                    positions.append((newX, y, False))
+    def printPiece(self):
+        print('type', self.type, ', (', self.x, ', ', self.y, ')')
 
-                # Square has a black piece, append and stop, capture
-                elif landingSquare < 0:
-                    positions.append((newX, y, True))
-                    break
+    def __str__(self):
+        return 'Piece: ' + str(self.type) + '(' + str(self.x) + ', ' + str(self.y) + ')'
 
-                # Square has a white piece, no new move and stop going
-                else:
-                    break
+class WhitePawn(Piece):
+    """
+    White Pawn
+    """
+    __slots__ = ()
 
-        # Determine right move positions
-        for i in range(1, 8):
+    type = PieceType.WHITEPAWN.value
+    value = 1
 
-            # Determine if the movement is in bounds
-            newX = x + i
+    canMoveTo = staticmethod(MOVE_GENERATORS[PieceType.WHITEPAWN.value])
 
-            if newX >= 0 and newX < Chess.BOARD_SIZE:
 
-                # Determine movement options. Append and keep going if square is 0, append and stop if black, stop if white
-                landingSquare = game.board[y][newX]
-                
-                # Square is empty, append and keep going, no capture
-                if landingSquare == 0:
-                    positions.append((newX, y, False))
 
-                # Square has a black piece, append and stop, capture
-                elif landingSquare < 0:
-                    positions.append((newX, y, True))
-                    break
+class WhiteKnight(Piece):
+    """
+    White Knight
+    """
+    __slots__ = ()
 
-                # Square has a white piece, no new move and stop going
-                else:
-                    break
+    type = PieceType.WHITEKNIGHT.value
+    value = 3
 
-        # Determine up positions
-        for i in range(1, 8):
+    canMoveTo = staticmethod(MOVE_GENERATORS[PieceType.WHITEKNIGHT.value])
 
-            # Determine if the movement is in bounds
-            newY = y - i
 
-            if newY >= 0 and newY < Chess.BOARD_SIZE:
 
-                # Determine movement options. Append and keep going if square is 0, append and stop if black, stop if white
-                landingSquare = game.board[newY][x]
-                
-                # Square is empty, append and keep going, no capture
-                if landingSquare == 0:
-                    positions.append((x, newY, False))
+class WhiteBishop(Piece):
+    """
+    White Bishop
+    """
+    __slots__ = ()
 
-                # Square has a black piece, append and stop, capture
-                elif landingSquare < 0:
-                    positions.append((x, newY, True))
-                    break
+    type = PieceType.WHITEBISHOP.value
+    value = 3
 
-                # Square has a white piece, no new move and stop going
-                else:
-                    break
+    canMoveTo = staticmethod(MOVE_GENERATORS[PieceType.WHITEBISHOP.value])
 
-        # Determine down positions
-        for i in range(1, 8):
 
-            # Determine if the movement is in bounds
-            newY = y + i
 
-            if newY >= 0 and newY < Chess.BOARD_SIZE:
+class WhiteRook(Piece):
+    """
+    White Rook
+    """
+    __slots__ = ()
 
-                # Determine movement options. Append and keep going if square is 0, append and stop if black, stop if white
-                landingSquare = game.board[newY][x]
-                
-                # Square is empty, append and keep going, no capture
-                if landingSquare == 0:
-                    positions.append((x, newY, False))
+    type = PieceType.WHITEROOK.value
+    value = 5
 
-                # Square has a black piece, append and stop, capture
-                elif landingSquare < 0:
-                    positions.append((x, newY, True))
-                    break
+    canMoveTo = staticmethod(MOVE_GENERATORS[PieceType.WHITEROOK.value])
 
-                # Square has a white piece, no new move and stop going
-                else:
-                    break
-
-        return positions
-    
 
 
 class WhiteQueen(Piece):
     """
     White Queen
     """
-    def __init__(self, x, y) -> None:
-
-        self.type = PieceType.WHITEQUEEN.value
-        self.value = 9
-        self.x = x
-        self.y = y
- 
-    def canMoveTo(x : int, y : int, game : Chess) -> list:
-
-        # Define positions the queen can move to
-        positions = []
-    
+    __slots__ = ()
 
-        # Determine the vertical and horizontal movement positions
+    type = PieceType.WHITEQUEEN.value
+    value = 9
 
-        # Determine left move positions
-        for i in range(1, 8):
+    canMoveTo = staticmethod(MOVE_GENERATORS[PieceType.WHITEQUEEN.value])
 
-            # Determine if the movement is in bounds
-            newX = x - i
-
-            if newX >= 0 and newX < Chess.BOARD_SIZE:
-
-                # Determine movement options. Append and keep going if square is 0, append and stop if black, stop if white
-                landingSquare = game.board[y][newX]
-                
-                # Square is empty, append and keep going, no capture
-                if landingSquare == 0:
-                    positions.append((newX, y, False))
-
-                # Square has a black piece, append and stop, capture
-                elif landingSquare < 0:
-                    positions.append((newX, y, True))
-                    break
-
-                # Square has a white piece, no new move and stop going
-                else:
-                    break
-
-        # Determine right move positions
-        for i in range(1, 8):
-
-            # Determine if the movement is in bounds
-            newX = x + i
-
-            if newX >= 0 and newX < Chess.BOARD_SIZE:
-
-                # Determine movement options. Append and keep going if square is 0, append and stop if black, stop if white
-                landingSquare = game.board[y][newX]
-                
-                # Square is empty, append and keep going, no capture
-                if landingSquare == 0:
-                    positions.append((newX, y, False))
-
-                # Square has a black piece, append and stop, capture
-                elif landingSquare < 0:
-                    positions.append((newX, y, True))
-                    break
-
-                # Square has a white piece, no new move and stop going
-                else:
-                    break
-
-        # Determine up positions
-        for i in range(1, 8):
-
-            # Determine if the movement is in bounds
-            newY = y - i
-
-            if newY >= 0 and newY < Chess.BOARD_SIZE:
-
-                # Determine movement options. Append and keep going if square is 0, append and stop if black, stop if white
-                landingSquare = game.board[newY][x]
-                
-                # Square is empty, append and keep going, no capture
-                if landingSquare == 0:
-                    positions.append((x, newY, False))
-
-                # Square has a black piece, append and stop, capture
-                elif landingSquare < 0:
-                    positions.append((x, newY, True))
-                    break
-
-                # Square has a white piece, no new move and stop going
-                else:
-                    break
-
-        # Determine down positions
-        for i in range(1, 8):
-
-            # Determine if the movement is in bounds
-            newY = y + i
-
-            if newY >= 0 and newY < Chess.BOARD_SIZE:
-
-                # Determine movement options. Append and keep going if square is 0, append and stop if black, stop if white
-                landingSquare = game.board[newY][x]
-                
-                # Square is empty, append and keep going, no capture
-                if landingSquare == 0:
-                    positions.append((x, newY, False))
-
-                # Square has a black piece, append and stop, capture
-                elif landingSquare < 0:
-                    positions.append((x, newY, True))
-                    break
-
-                # Square has a white piece, no new move and stop going
-                else:
-                    break
-
-        # Determine the diagnal movement positions
-
-        # Determine the up right movement positions
-        for i in range(1, 8):
-
-            # Set up the new x and new y variables
-            newX = x + i
-            newY = y - i
-            
-            # Determine if the up right movement is not in bounds, break loop
-            if not(newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE):
-                break
-
-            # In bounds, keep adding if sqares are empty. Add if black then stop, stop if white
-            landingSquare = game.board[newY][newX]
-
-            # Square is empty, append and keep going, no capture
-            if landingSquare == 0:
-                positions.append((newX, newY, False))
-
-            # Square is black square, append and stop going, capture
-            elif landingSquare < 0:
-                positions.append((newX, newY, True))
-                break
-
-            # Square is white square, no new move and stop going
-            else:
-                break
-
-        # Determine the up left movement positions
-        for i in range(1, 8):
-
-            # Set up the new x and new y variables
-            newX = x - i
-            newY = y - i
-            
-            # Determine if the up left movement is not in bounds, break loop
-            if not(newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE):
-                break
-
-            # In bounds, keep adding if sqares are empty. Add if black then stop, stop if white
-            landingSquare = game.board[newY][newX]
-
-            # Square is empty, append and keep going, no capture
-            if landingSquare == 0:
-                positions.append((newX, newY, False))
-
-            # Square is black square, append and stop going, capture
-            elif landingSquare < 0:
-                positions.append((newX, newY, True))
-                break
-
-            # Square is white square, no new move and stop going
-            else:
-                break
-
-        # Determine the down left movement positions
-        for i in range(1, 8):
-
-            # Set up the new x and new y variables
-            newX = x - i
-            newY = y + i
-            
-            # Determine if the down left movement is not in bounds, break loop
-            if not(newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE):
-                break
-
-            # In bounds, keep adding if sqares are empty. Add if black then stop, stop if white
-            landingSquare = game.board[newY][newX]
-
-            # Square is empty, append and keep going, no capture
-            if landingSquare == 0:
-                positions.append((newX, newY, False))
-
-            # Square is black square, append and stop going, capture
-            elif landingSquare < 0:
-                positions.append((newX, newY, True))
-                break
-
-            # Square is white square, no new move and stop going
-            else:
-                break
-
-        # Determine the down right movement positions
-        for i in range(1, 8):
-
-            # Set up the new x and new y variables
-            newX = x + i
-            newY = y + i
-            
-            # Determine if the down right movement is not in bounds, break loop
-            if not(newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE):
-                break
-
-            # In bounds, keep adding if sqares are empty. Add if black then stop, stop if white
-            landingSquare = game.board[newY][newX]
-
-            # Square is empty, append and keep going, no capture
-            if landingSquare == 0:
-                positions.append((newX, newY, False))
-
-            # Square is black square, append and stop going, capture
-            elif landingSquare < 0:
-                positions.append((newX, newY, True))
-                break
-
-            # Square is white square, no new move and stop going
-            else:
-                break
-
-        return positions
-    
 
 
 class WhiteKing(Piece):
     """
     White King
     """
-    def __init__(self, x, y) -> None:
-
-        self.type = PieceType.WHITEKING.value
-        self.value = 1000
-        self.x = x
-        self.y = y
- 
-    def canMoveTo(x : int, y : int, game : Chess) -> list:
-
-        # Define positions the king can move to
-        positions = []
+    __slots__ = ()
 
-        # TODO Castling
+    type = PieceType.WHITEKING.value
+    value = 1000
 
-        # Define all possible king movement positions, relative to current position
-        potentialPositions = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+    canMoveTo = staticmethod(MOVE_GENERATORS[PieceType.WHITEKING.value])
 
-        # Determine valid potential positions. 
-        for position in potentialPositions:
-
-            # Determine if move is in bounds
-            newX, newY = (x + position[0]), (y + position[1])
-
-            if newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE:
-
-                # Move and append no capture if 0 (empty), Move and append with capture if negative (black piece), don't do anything if white piece
-                landingSquare = game.board[newY][newX]
-
-                # Empty square, move and append (no capture)
-                if landingSquare == 0:
-                    positions.append((newX, newY, False))
-                
-                # Black piece, move and append (capture)
-                elif landingSquare < 0:
-                    positions.append((newX, newY, True))
-
-        return positions
-    
 
 
 class BlackPawn(Piece):
     """
     Black Pawn
     """
-    def __init__(self, x, y) -> None:
-
-        self.type = PieceType.BLACKPAWN.value
-        self.value = -1
-        self.x = x
-        self.y = y
- 
-
-    def canMoveTo(x : int, y : int, game : Chess) -> list:
-
-        # Define positions the pawn can move to
-        positions = []
-
-        # Pawns can move forward once at any time if nothing blocking it's path
-        if game.board[y + 1][x] == 0:
-            positions.append((x, y + 1, False))
+    __slots__ = ()
 
-        # Determine regular capture movements
-        potentialPositions = [(x - 1, y + 1), (x + 1, y + 1)]
+    type = PieceType.BLACKPAWN.value
+    value = -1
 
-        for position in potentialPositions:
-            # Determine if capture is in bounds
-            if position[0] >= 0 and position[1] >= 0 and position[0] < Chess.BOARD_SIZE and position[1] < Chess.BOARD_SIZE:
+    canMoveTo = staticmethod(MOVE_GENERATORS[PieceType.BLACKPAWN.value])
 
-                # Determine if piece in capture square is white
-                if game.board[position[1]][position[0]] > 0:
-                    positions.append((position[0], position[1], True))
-
-        # Determine en passant capture movements
-
-        # Check left en passant
-        if (x - 1) in game.twoWhitePawnMovement and y == 4:
-            # Left en passant possible, append as capture
-            positions.append((x - 1, y + 1, True))
-
-        # Check right en passant
-        if (x + 1) in game.twoWhitePawnMovement and y == 4:
-            # Right en passant possible, append as capture
-            positions.append((x + 1, y + 1, True))
-
-        # Pawns can move forward twice if hasnt moved and nothing blocking it's path
-        if y == 1 and game.board[y + 2][x] == 0:
-            positions.append((x, y + 2, False))
-
-        return positions
-    
 
 
 class BlackKnight(Piece):
     """
     Black Knight
     """
-    def __init__(self, x, y) -> None:
-
-        self.type = PieceType.BLACKKNIGHT.value
-        self.value = -3
-        self.x = x
-        self.y = y
- 
-    def canMoveTo(x : int, y : int, game : Chess) -> list:
+    __slots__ = ()
 
-        # Define positions the knight can move to
-        positions = []
-
-        # Define positions for knight to move (to add to existing x and y values)
-        potentialPositions = [(-1, -2), (1, -2), (-2, -1), (-2, 1), (-1, 2), (1, 2), (2, 1), (2, -1)]
-
-        # Determine where the knight can move
-        for move in potentialPositions:
-            # Move must be in bounds of the board
-            if x + move[0] >= 0 and y + move[1] >= 0 and x + move[0] < Chess.BOARD_SIZE and y + move[1] < Chess.BOARD_SIZE:
-                
-                # Move cannot land on a black piece
-                landingSquare = game.board[y + move[1]][x + move[0]]
+    type = PieceType.BLACKKNIGHT.value
+    value = -3
 
-                if landingSquare >= 0:
+    canMoveTo = staticmethod(MOVE_GENERATORS[PieceType.BLACKKNIGHT.value])
 
-                    # Knight capturing piece
-                    if landingSquare > 0:
-                        positions.append((x + move[0], y + move[1], True))
-                    # Knight not capturing piece
-                    else:
-                        positions.append((x + move[0], y + move[1], False))
-
-        return positions
-    
 
 
 class BlackBishop(Piece):
     """
     Black Bishop
     """
-    def __init__(self, x, y) -> None:
+    __slots__ = ()
 
-        self.type = PieceType.BLACKBISHOP.value
-        self.value = -3
-        self.x = x
-        self.y = y
- 
-    def canMoveTo(x : int, y : int, game : Chess) -> list:
-
-        # Define the movement options for the bishop
-        positions = []
-
-        # Determine the up right movement positions
-        for i in range(1, 8):
-
-            # Set up the new x and new y variables
-            newX = x + i
-            newY = y - i
-            
-            # Determine if the up right movement is not in bounds, break loop
-            if not(newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE):
-                break
-
-            # In bounds, keep adding if sqares are empty. Add if white then stop, stop if black
-            landingSquare = game.board[newY][newX]
-
-            # Square is empty, append and keep going, no capture
-            if landingSquare == 0:
-                positions.append((newX, newY, False))
-
-            # Square is white square, append and stop going, capture
-            elif landingSquare > 0:
-                positions.append((newX, newY, True))
-                break
+    type = PieceType.BLACKBISHOP.value
+    value = -3
 
-            # Square is black square, no new move and stop going
-            else:
-                break
-
-        # Determine the up left movement positions
-        for i in range(1, 8):
-
-            # Set up the new x and new y variables
-            newX = x - i
-            newY = y - i
-            
-            # Determine if the up left movement is not in bounds, break loop
-            if not(newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE):
-                break
-
-            # In bounds, keep adding if sqares are empty. Add if white then stop, stop if black
-            landingSquare = game.board[newY][newX]
-
-            # Square is empty, append and keep going, no capture
-            if landingSquare == 0:
-                positions.append((newX, newY, False))
-
-            # Square is white square, append and stop going, capture
-            elif landingSquare > 0:
-                positions.append((newX, newY, True))
-                break
-
-            # Square is black square, no new move and stop going
-            else:
-                break
-
-        # Determine the down left movement positions
-        for i in range(1, 8):
-
-            # Set up the new x and new y variables
-            newX = x - i
-            newY = y + i
-            
-            # Determine if the down left movement is not in bounds, break loop
-            if not(newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE):
-                break
-
-            # In bounds, keep adding if sqares are empty. Add if white then stop, stop if black
-            landingSquare = game.board[newY][newX]
-
-            # Square is empty, append and keep going, no capture
-            if landingSquare == 0:
-                positions.append((newX, newY, False))
-
-            # Square is white square, append and stop going, capture
-            elif landingSquare > 0:
-                positions.append((newX, newY, True))
-                break
-
-            # Square is black square, no new move and stop going
-            else:
-                break
-
-        # Determine the down right movement positions
-        for i in range(1, 8):
-
-            # Set up the new x and new y variables
-            newX = x + i
-            newY = y + i
-            
-            # Determine if the down right movement is not in bounds, break loop
-            if not(newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE):
-                break
-
-            # In bounds, keep adding if sqares are empty. Add if white then stop, stop if black
-            landingSquare = game.board[newY][newX]
-
-            # Square is empty, append and keep going, no capture
-            if landingSquare == 0:
-                positions.append((newX, newY, False))
-
-            # Square is white square, append and stop going, capture
-            elif landingSquare > 0:
-                positions.append((newX, newY, True))
-                break
-
-            # Square is black square, no new move and stop going
-            else:
-                break
-
-        return positions
+    canMoveTo = staticmethod(MOVE_GENERATORS[PieceType.BLACKBISHOP.value])
 
 
 
@@ -1269,389 +1343,53 @@ class BlackRook(Piece):
     """
     Black Rook
     """
-    def __init__(self, x, y) -> None:
-
-        self.type = PieceType.BLACKROOK.value
-        self.value = -5
-        self.x = x
-        self.y = y
- 
-    def canMoveTo(x : int, y : int, game : Chess) -> list:
+    __slots__ = ()
 
-        # Define the positions the rook can move to
-        positions = []
+    type = PieceType.BLACKROOK.value
+    value = -5
 
-        # Determine left move positions
-        for i in range(1, 8):
+    canMoveTo = staticmethod(MOVE_GENERATORS[PieceType.BLACKROOK.value])
 
-            # Determine if the movement is in bounds
-            newX = x - i
-
-            if newX >= 0 and newX < Chess.BOARD_SIZE:
-
-                # Determine movement options. Append and keep going if square is 0, append and stop if white, stop if black
-                landingSquare = game.board[y][newX]
-                
-                # Square is empty, append and keep going, no capture
-                if landingSquare == 0:
-                    positions.append((newX, y, False))
-
-                # Square has a white piece, append and stop, capture
-                elif landingSquare > 0:
-                    positions.append((newX, y, True))
-                    break
-
-                # Square has a white piece, no new move and stop going
-                else:
-                    break
-
-        # Determine right move positions
-        for i in range(1, 8):
-
-            # Determine if the movement is in bounds
-            newX = x + i
-
-            if newX >= 0 and newX < Chess.BOARD_SIZE:
-
-                # Determine movement options. Append and keep going if square is 0, append and stop if white, stop if black
-                landingSquare = game.board[y][newX]
-                
-                # Square is empty, append and keep going, no capture
-                if landingSquare == 0:
-                    positions.append((newX, y, False))
-
-                # Square has a white piece, append and stop, capture
-                elif landingSquare > 0:
-                    positions.append((newX, y, True))
-                    break
-
-                # Square has a black piece, no new move and stop going
-                else:
-                    break
-
-        # Determine up positions
-        for i in range(1, 8):
-
-            # Determine if the movement is in bounds
-            newY = y - i
-
-            if newY >= 0 and newY < Chess.BOARD_SIZE:
-
-                # Determine movement options. Append and keep going if square is 0, append and stop if white, stop if black
-                landingSquare = game.board[newY][x]
-                
-                # Square is empty, append and keep going, no capture
-                if landingSquare == 0:
-                    positions.append((x, newY, False))
-
-                # Square has a white piece, append and stop, capture
-                elif landingSquare > 0:
-                    positions.append((x, newY, True))
-                    break
-
-                # Square has a black piece, no new move and stop going
-                else:
-                    break
-
-        # Determine down positions
-        for i in range(1, 8):
-
-            # Determine if the movement is in bounds
-            newY = y + i
-
-            if newY >= 0 and newY < Chess.BOARD_SIZE:
-
-                # Determine movement options. Append and keep going if square is 0, append and stop if white, stop if black
-                landingSquare = game.board[newY][x]
-                
-                # Square is empty, append and keep going, no capture
-                if landingSquare == 0:
-                    positions.append((x, newY, False))
-
-                # Square has a white piece, append and stop, capture
-                elif landingSquare > 0:
-                    positions.append((x, newY, True))
-                    break
-
-                # Square has a black piece, no new move and stop going
-                else:
-                    break
-
-        return positions
-    
 
 
 class BlackQueen(Piece):
     """
     Black Queen
     """
-    def __init__(self, x, y) -> None:
-
-        self.type = PieceType.BLACKQUEEN.value
-        self.value = -9
-        self.x = x
-        self.y = y
- 
-    def canMoveTo(x : int, y : int, game : Chess) -> list:
-
-        # Define all of the positions the queen can move to
-        positions = []
+    __slots__ = ()
 
+    type = PieceType.BLACKQUEEN.value
+    value = -9
 
-        # Determine the vertical and horizontal movement positions
+    canMoveTo = staticmethod(MOVE_GENERATORS[PieceType.BLACKQUEEN.value])
 
-        # Determine left move positions
-        for i in range(1, 8):
-
-            # Determine if the movement is in bounds
-            newX = x - i
-
-            if newX >= 0 and newX < Chess.BOARD_SIZE:
-
-                # Determine movement options. Append and keep going if square is 0, append and stop if white, stop if black
-                landingSquare = game.board[y][newX]
-                
-                # Square is empty, append and keep going, no capture
-                if landingSquare == 0:
-                    positions.append((newX, y, False))
-
-                # Square has a white piece, append and stop, capture
-                elif landingSquare > 0:
-                    positions.append((newX, y, True))
-                    break
-
-                # Square has a white piece, no new move and stop going
-                else:
-                    break
-
-        # Determine right move positions
-        for i in range(1, 8):
-
-            # Determine if the movement is in bounds
-            newX = x + i
-
-            if newX >= 0 and newX < Chess.BOARD_SIZE:
-
-                # Determine movement options. Append and keep going if square is 0, append and stop if white, stop if black
-                landingSquare = game.board[y][newX]
-                
-                # Square is empty, append and keep going, no capture
-                if landingSquare == 0:
-                    positions.append((newX, y, False))
-
-                # Square has a white piece, append and stop, capture
-                elif landingSquare > 0:
-                    positions.append((newX, y, True))
-                    break
-
-                # Square has a black piece, no new move and stop going
-                else:
-                    break
-
-        # Determine up positions
-        for i in range(1, 8):
-
-            # Determine if the movement is in bounds
-            newY = y - i
-
-            if newY >= 0 and newY < Chess.BOARD_SIZE:
-
-                # Determine movement options. Append and keep going if square is 0, append and stop if white, stop if black
-                landingSquare = game.board[newY][x]
-                
-                # Square is empty, append and keep going, no capture
-                if landingSquare == 0:
-                    positions.append((x, newY, False))
-
-                # Square has a white piece, append and stop, capture
-                elif landingSquare > 0:
-                    positions.append((x, newY, True))
-                    break
-
-                # Square has a black piece, no new move and stop going
-                else:
-                    break
-
-        # Determine down positions
-        for i in range(1, 8):
-
-            # Determine if the movement is in bounds
-            newY = y + i
-
-            if newY >= 0 and newY < Chess.BOARD_SIZE:
-
-                # Determine movement options. Append and keep going if square is 0, append and stop if white, stop if black
-                landingSquare = game.board[newY][x]
-                
-                # Square is empty, append and keep going, no capture
-                if landingSquare == 0:
-                    positions.append((x, newY, False))
-
-                # Square has a white piece, append and stop, capture
-                elif landingSquare > 0:
-                    positions.append((x, newY, True))
-                    break
-
-                # Square has a black piece, no new move and stop going
-                else:
-                    break
-
-        # Determine the diagnal movement positions
-
-        # Determine the up right movement positions
-        for i in range(1, 8):
-
-            # Set up the new x and new y variables
-            newX = x + i
-            newY = y - i
-            
-            # Determine if the up right movement is not in bounds, break loop
-            if not(newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE):
-                break
-
-            # In bounds, keep adding if sqares are empty. Add if white then stop, stop if black
-            landingSquare = game.board[newY][newX]
-
-            # Square is empty, append and keep going, no capture
-            if landingSquare == 0:
-                positions.append((newX, newY, False))
-
-            # Square is white square, append and stop going, capture
-            elif landingSquare > 0:
-                positions.append((newX, newY, True))
-                break
-
-            # Square is black square, no new move and stop going
-            else:
-                break
-
-        # Determine the up left movement positions
-        for i in range(1, 8):
-
-            # Set up the new x and new y variables
-            newX = x - i
-            newY = y - i
-            
-            # Determine if the up left movement is not in bounds, break loop
-            if not(newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE):
-                break
-
-            # In bounds, keep adding if sqares are empty. Add if white then stop, stop if black
-            landingSquare = game.board[newY][newX]
-
-            # Square is empty, append and keep going, no capture
-            if landingSquare == 0:
-                positions.append((newX, newY, False))
-
-            # Square is white square, append and stop going, capture
-            elif landingSquare > 0:
-                positions.append((newX, newY, True))
-                break
-
-            # Square is black square, no new move and stop going
-            else:
-                break
-
-        # Determine the down left movement positions
-        for i in range(1, 8):
-
-            # Set up the new x and new y variables
-            newX = x - i
-            newY = y + i
-            
-            # Determine if the down left movement is not in bounds, break loop
-            if not(newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE):
-                break
-
-            # In bounds, keep adding if sqares are empty. Add if white then stop, stop if black
-            landingSquare = game.board[newY][newX]
-
-            # Square is empty, append and keep going, no capture
-            if landingSquare == 0:
-                positions.append((newX, newY, False))
-
-            # Square is white square, append and stop going, capture
-            elif landingSquare > 0:
-                positions.append((newX, newY, True))
-                break
-
-            # Square is black square, no new move and stop going
-            else:
-                break
-
-        # Determine the down right movement positions
-        for i in range(1, 8):
-
-            # Set up the new x and new y variables
-            newX = x + i
-            newY = y + i
-            
-            # Determine if the down right movement is not in bounds, break loop
-            if not(newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE):
-                break
-
-            # In bounds, keep adding if sqares are empty. Add if white then stop, stop if black
-            landingSquare = game.board[newY][newX]
-
-            # Square is empty, append and keep going, no capture
-            if landingSquare == 0:
-                positions.append((newX, newY, False))
-
-            # Square is white square, append and stop going, capture
-            elif landingSquare > 0:
-                positions.append((newX, newY, True))
-                break
-
-            # Square is black square, no new move and stop going
-            else:
-                break
-
-        return positions
-    
 
 
 class BlackKing(Piece):
     """
     Black King
     """
-    def __init__(self, x, y) -> None:
-
-        self.type = PieceType.BLACKKING.value
-        self.value = -1000
-        self.x = x
-        self.y = y
- 
-    def canMoveTo(x : int, y : int, game : Chess) -> list:
-
-        # Define the positions teh king can move to
-        positions = []
-
-        # Define all possible king movement positions, relative to current position
-        potentialPositions = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
-
-        # Determine valid potential positions. 
-        for position in potentialPositions:
-
-            # Determine if move is in bounds
-            newX, newY = (x + position[0]), (y + position[1])
-
-            if newX >= 0 and newX < Chess.BOARD_SIZE and newY >= 0 and newY < Chess.BOARD_SIZE:
-
-                # Move and append no capture if 0 (empty), Move and append with capture if positive (white piece), don't do anything if black piece
-                landingSquare = game.board[newY][newX]
-
-                # Empty square, move and append (no capture)
-                if landingSquare == 0:
-                    positions.append((newX, newY, False))
-                
-                # White piece, move and append (capture)
-                elif landingSquare > 0:
-                    positions.append((newX, newY, True))
-
-        return positions
-
-
-
-# TEST
-print(1)
-c = Chess()
+    __slots__ = ()
+
+    type = PieceType.BLACKKING.value
+    value = -1000
+
+    canMoveTo = staticmethod(MOVE_GENERATORS[PieceType.BLACKKING.value])
+
+
+
+# Piece classes indexed by PieceType value, used to create and promote pieces
+PIECE_CLASSES = {
+    PieceType.WHITEPAWN.value: WhitePawn,
+    PieceType.WHITEKNIGHT.value: WhiteKnight,
+    PieceType.WHITEBISHOP.value: WhiteBishop,
+    PieceType.WHITEROOK.value: WhiteRook,
+    PieceType.WHITEQUEEN.value: WhiteQueen,
+    PieceType.WHITEKING.value: WhiteKing,
+    PieceType.BLACKPAWN.value: BlackPawn,
+    PieceType.BLACKKNIGHT.value: BlackKnight,
+    PieceType.BLACKBISHOP.value: BlackBishop,
+    PieceType.BLACKROOK.value: BlackRook,
+    PieceType.BLACKQUEEN.value: BlackQueen,
+    PieceType.BLACKKING.value: BlackKing,
+}
@@ -1,6 +1,5 @@
 import tkinter as tk
 from PIL import Image, ImageTk
-from PieceType import PieceType
 from Chess import *
 
 class ChessVisual:
@@ -188,16 +187,12 @@ class ChessVisual:
         # Promotion occured
         if moveInfo[1]:
 
-            print('PROMO FROM VIS')
-            # Update the pawn sprite for a queen sprite
-
             # Remove pawn 
             pawnToRemove = self.window.grid_slaves(row=newY, column=newX)[0]
-            self.setPiece(PieceType.WHITEQUEEN.value, newX, newY)
-            print(pawnToRemove)
+            pawnToRemove.grid_remove()
 
-        # TODO Remove
-        self.game.printBoard()
+            # Set the sprite of the piece the pawn promoted to, in its own colour
+            self.setPiece(self.game.board[newY][newX], newX, newY)
 
     
     def highlightPotentialMoves(self):
@@ -0,0 +1,57 @@
+from PieceType import PieceType
+
+
+class Move:
+    """
+    Compact integer encoding of a move, used instead of (x, y, capture) tuples.
+    Squares are stored as y * 8 + x.
+    - bits 0-5: square the piece moves from
+    - bits 6-11: square the piece moves to
+    - bit 12: set if the move captures a piece
+    - bit 13: set if the move is an en passant capture
+    - bit 14: set if the move is a pawn moving two squares
+    - bits 15-17: absolute PieceType value of the promotion piece, 0 if not a promotion
+    """
+
+    CAPTURE = 1 << 12
+    EN_PASSANT = 1 << 13
+    TWO_SQUARE_PAWN = 1 << 14
+    PROMOTION_SHIFT = 15
+
+    # Promotion pieces, strongest first
+    PROMOTIONS = [PieceType.WHITEQUEEN.value, PieceType.WHITEROOK.value, PieceType.WHITEBISHOP.value, PieceType.WHITEKNIGHT.value]
+
+    # Letters used for promotions in coordinate notation, indexed by absolute PieceType value
+    PROMOTION_LETTERS = ['', '', 'n', 'b', 'r', 'q', '']
+
+
+    def encode(oldX : int, oldY : int, newX : int, newY : int, flags : int = 0, promotion : int = 0) -> int:
+        """
+        Encodes a move as an integer
+        - oldX, oldY: position the piece moves from
+        - newX, newY: position the piece moves to
+        - flags: any of Move.CAPTURE, Move.EN_PASSANT and Move.TWO_SQUARE_PAWN
+        - promotion: absolute PieceType value of the promotion piece, 0 if not a promotion
+        """
+        return (oldY * 8 + oldX) | ((newY * 8 + newX) << 6) | flags | (promotion << Move.PROMOTION_SHIFT)
+
+
+    def promotion(move : int) -> int:
+        """
+        Returns the absolute PieceType value of the promotion piece, 0 if not a promotion
+        """
+        return move >> Move.PROMOTION_SHIFT
+
+
+    def squareName(square : int) -> str:
+        """
+        Returns the algebraic name of a square index, a8 being square 0
+        """
+        return 'abcdefgh'[square & 7] + str(8 - (square >> 3))
+
+
+    def toString(move : int) -> str:
+        """
+        Returns the move in coordinate notation, such as e2e4 or a7a8q
+        """
+        return Move.squareName(move & 63) + Move.squareName((move >> 6) & 63) + Move.PROMOTION_LETTERS[move >> Move.PROMOTION_SHIFT]
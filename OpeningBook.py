@@ -0,0 +1,202 @@
+import argparse
+import mmap
+import random
+import struct
+
+from Chess import Chess
+from Move import Move
+from PgnReader import PgnReader
+
+
+class OpeningBook:
+    """
+    Book of opening moves stored in a binary file that is memory-mapped and binary searched, so a
+    book opens at once and only the pages a lookup touches are read into memory. After an 8 byte
+    header the file holds 16 byte entries sorted by position and move:
+    - bytes 0-7: Zobrist hash of the position, Chess.hash
+    - bytes 8-11: move encoded by Move.encode
+    - bytes 12-15: weight, how strongly the move is recommended
+    """
+
+    MAGIC = b'CHESSBK1'
+    HEADER_BYTES = 8
+    ENTRY = struct.Struct('<QII')
+
+    # Weight a game adds to the moves of the side that won, drew or lost it
+    WIN_WEIGHT = 2
+    DRAW_WEIGHT = 1
+    LOSS_WEIGHT = 0
+
+    def __init__(self, path : str) -> None:
+        """
+        Opens a book file built by OpeningBook.build
+        - path: book file to open
+        """
+        self.file = open(path, 'rb')
+
+        header = self.file.read(OpeningBook.HEADER_BYTES)
+        if header != OpeningBook.MAGIC:
+            self.file.close()
+            raise ValueError('Not an opening book: ' + path)
+
+        # An empty book has nothing to map
+        size = self.file.seek(0, 2)
+        self.entries = (size - OpeningBook.HEADER_BYTES) // OpeningBook.ENTRY.size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.entries else None
+
+
+    def close(self) -> None:
+        """
+        Unmaps and closes the book file
+        """
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        self.file.close()
+
+
+    def entryKey(self, index : int) -> int:
+        """
+        Returns the position hash of an entry
+        """
+        return struct.unpack_from('<Q', self.data, OpeningBook.HEADER_BYTES + index * OpeningBook.ENTRY.size)[0]
+
+
+    def lookup(self, key : int) -> list:
+        """
+        Returns the (move, weight) entries of a position, an empty list if it isn't in the book
+        - key: Zobrist hash of the position
+        """
+        # Binary search for the first entry of the position
+        low, high = 0, self.entries
+        while low < high:
+            middle = (low + high) // 2
+            if self.entryKey(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        moves = []
+        offset = OpeningBook.HEADER_BYTES + low * OpeningBook.ENTRY.size
+
+        for index in range(low, self.entries):
+            entryKey, move, weight = OpeningBook.ENTRY.unpack_from(self.data, offset)
+            if entryKey != key:
+                break
+            moves.append((move, weight))
+            offset += OpeningBook.ENTRY.size
+
+        return moves
+
+
+    def bookMoves(self, game : Chess) -> list:
+        """
+        Returns the (move, weight) entries of a game's position that are legal in it, guarding
+        against hash collisions
+        - game: position to look up
+        """
+        return [(move, weight) for move, weight in self.lookup(game.hash) if weight > 0 and game.isLegal(move)]
+
+
+    def chooseMove(self, game : Chess, generator : random.Random = None) -> int:
+        """
+        Returns a book move for a position picked at random in proportion to the weights, 0 if
+        the position isn't in the book
+        - game: position to pick a move for
+        - generator: random number generator, the random module if None
+        """
+        moves = self.bookMoves(game)
+        if not moves:
+            return 0
+
+        pick = (generator or random).randrange(sum(weight for move, weight in moves))
+        for move, weight in moves:
+            pick -= weight
+            if pick < 0:
+                return move
+
+
+    def bestMove(self, game : Chess) -> int:
+        """
+        Returns the book move with the highest weight for a position, 0 if it isn't in the book
+        - game: position to pick a move for
+        """
+        moves = self.bookMoves(game)
+        return max(moves, key=lambda entry: entry[1])[0] if moves else 0
+
+
+    def build(pgnPath : str, bookPath : str, maxPlies : int = 20, minWeight : int = 1) -> tuple:
+        """
+        Compiles a book from the games of a PGN file and returns (games read, entries written).
+        Every position of the first plies of each game gets the move played, weighted by the
+        game's result for the side that played it. Games stop counting at castling, which the
+        rules don't support, or at any move that can't be played.
+        - pgnPath: PGN file to read
+        - bookPath: book file to write
+        - maxPlies: plies of each game to add
+        - minWeight: leave out moves whose total weight is below this
+        """
+        weights = {}
+        games = 0
+
+        for tags, moves, result in PgnReader.readFile(pgnPath):
+            games += 1
+
+            # Weights for white's and black's moves
+            if result == '1-0':
+                resultWeights = (OpeningBook.WIN_WEIGHT, OpeningBook.LOSS_WEIGHT)
+            elif result == '0-1':
+                resultWeights = (OpeningBook.LOSS_WEIGHT, OpeningBook.WIN_WEIGHT)
+            else:
+                resultWeights = (OpeningBook.DRAW_WEIGHT, OpeningBook.DRAW_WEIGHT)
+
+            game = PgnReader.startPosition(tags)
+
+            try:
+                for san in moves[:maxPlies]:
+                    move = PgnReader.resolveSan(game, san)
+                    entry = (game.hash, move)
+                    weights[entry] = weights.get(entry, 0) + resultWeights[0 if game.whiteTurn else 1]
+                    game.makeMove(move)
+            except ValueError:
+                pass
+
+        entries = sorted(entry + (weight,) for entry, weight in weights.items() if weight >= minWeight)
+
+        with open(bookPath, 'wb') as book:
+            book.write(OpeningBook.MAGIC)
+            for entry in entries:
+                book.write(OpeningBook.ENTRY.pack(*entry))
+
+        return (games, len(entries))
+
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Build an opening book from PGN games or look up a position in one')
+    parser.add_argument('book', help='book file')
+    parser.add_argument('--build', default=None, help='PGN file to build the book from')
+    parser.add_argument('--plies', type=int, default=20, help='plies of each game to add when building')
+    parser.add_argument('--min-weight', type=int, default=1, help='leave out moves with a lower total weight when building')
+    parser.add_argument('--fen', default=None, help='position to look up, the initial position by default')
+    args = parser.parse_args()
+
+    if args.build is not None:
+        games, entries = OpeningBook.build(args.build, args.book, args.plies, args.min_weight)
+        print('read {} games, wrote {} entries to {}'.format(games, entries, args.book))
+        return
+
+    book = OpeningBook(args.book)
+    game = Chess(fen=args.fen)
+
+    moves = sorted(book.bookMoves(game), key=lambda entry: -entry[1])
+    for move, weight in moves:
+        print(Move.toString(move), weight)
+    if not moves:
+        print('position not in book')
+
+    book.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+import argparse
+import multiprocessing
+import os
+import random
+import time
+
+from Chess import Chess
+from Move import Move
+
+
+class Perft:
+    """
+    Counts the leaf nodes of the legal move tree of a position, used to check move generation
+    against known node counts and to measure its throughput
+    """
+
+    # Standard positions with known node counts, in the form (name, FEN, {depth: nodes}).
+    # Castling is not part of the rules, so positions and depths where castling is possible are left out.
+    SUITE = [
+        ('initial position', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1',
+            {1: 20, 2: 400, 3: 8902, 4: 197281, 5: 4865609, 6: 119060324}),
+        ('position 3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+            {1: 14, 2: 191, 3: 2812, 4: 43238, 5: 674624, 6: 11030083}),
+        ('illegal en passant move 1', '3k4/3p4/8/K1P4r/8/8/8/8 b - - 0 1', {6: 1134888}),
+        ('illegal en passant move 2', '8/8/4k3/8/2p5/8/B2P2K1/8 w - - 0 1', {6: 1015133}),
+        ('en passant capture checks opponent', '8/8/1k6/2b5/2pP4/8/5K2/8 b - d3 0 1', {6: 1440467}),
+        ('promote out of check', '2K2r2/4P3/8/8/8/8/8/3k4 w - - 0 1', {6: 3821001}),
+        ('discovered check', '8/8/1P2K3/8/2n5/1q6/8/5k2 b - - 0 1', {5: 1004658}),
+        ('promote to give check', '4k3/1P6/8/8/8/8/K7/8 w - - 0 1', {6: 217342}),
+        ('under promote to give check', '8/P1k5/K7/8/8/8/8/8 w - - 0 1', {6: 92683}),
+        ('self stalemate', 'K1k5/8/P7/8/8/8/8/8 w - - 0 1', {6: 2217}),
+        ('stalemate and checkmate 1', '8/k1P5/8/1K6/8/8/8/8 w - - 0 1', {7: 567584}),
+        ('stalemate and checkmate 2', '8/8/2k5/5q2/5n2/8/5K2/8 b - - 0 1', {4: 23527}),
+    ]
+
+
+    def perft(game : Chess, depth : int) -> int:
+        """
+        Returns the number of leaf nodes of the legal move tree of a position
+        - game: position to count from, left unchanged
+        - depth: number of plies to search
+        """
+        if depth <= 0:
+            return 1
+
+        moves = game.legalMoves()
+
+        # The last ply only needs the number of moves
+        if depth == 1:
+            return len(moves)
+
+        nodes = 0
+        for move in moves:
+            game.makeMove(move)
+            nodes += Perft.perft(game, depth - 1)
+            game.unmakeMove()
+
+        return nodes
+
+
+    def divide(game : Chess, depth : int) -> dict:
+        """
+        Returns the perft node count below each legal move of a position, keyed by the move in
+        coordinate notation. Used to find which move a wrong count comes from.
+        - game: position to count from, left unchanged
+        - depth: number of plies to search, including the divided move
+        """
+        counts = {}
+
+        for move in game.legalMoves():
+            game.makeMove(move)
+            counts[Move.toString(move)] = Perft.perft(game, depth - 1)
+            game.unmakeMove()
+
+        return counts
+
+
+    def parallelDivide(game : Chess, depth : int, pool) -> tuple:
+        """
+        Splits the root moves of a position over a process pool and returns (the node count below
+        each move keyed by the move in coordinate notation, the nodes counted by each worker keyed by
+        its process id). Workers get the position as FEN and the move to count below.
+        - game: position to count from, left unchanged
+        - depth: number of plies to search, including the divided move
+        - pool: multiprocessing pool to run the subtrees on
+        """
+        fen = game.toFEN()
+        counts = {}
+        workerNodes = {}
+
+        # Subtrees finish in any order, one at a time keeps the workers evenly loaded
+        items = [(fen, move, depth - 1) for move in game.legalMoves()]
+        for move, nodes, worker in pool.imap_unordered(perftSubtree, items):
+            counts[Move.toString(move)] = nodes
+            workerNodes[worker] = workerNodes.get(worker, 0) + nodes
+
+        return (counts, workerNodes)
+
+
+    def runSuite(maxDepth : int, processes : int = 1) -> bool:
+        """
+        Runs every suite position up to a depth, printing the node counts and nodes per second.
+        Returns True if every count matches.
+        - maxDepth: deepest depth to run
+        - processes: worker processes to split the root moves over, 1 to count in this process
+        """
+        passed = True
+        totalNodes = 0
+        totalTime = 0.0
+        pool = multiprocessing.Pool(processes) if processes > 1 else None
+
+        for name, fen, counts in Perft.SUITE:
+            for depth, expected in sorted(counts.items()):
+
+                if depth > maxDepth:
+                    continue
+
+                game = Chess.fromFEN(fen)
+
+                start = time.perf_counter()
+                if pool is not None:
+                    nodes = sum(Perft.parallelDivide(game, depth, pool)[0].values())
+                else:
+                    nodes = Perft.perft(game, depth)
+                elapsed = time.perf_counter() - start
+
+                totalNodes += nodes
+                totalTime += elapsed
+
+                result = 'ok' if nodes == expected else 'FAIL expected ' + str(expected)
+                passed = passed and nodes == expected
+
+                print('{:36s} depth {} {:>10d} nodes {:>8.2f}s {:>9.0f} nps  {}'.format(name, depth, nodes, elapsed, nodes / max(elapsed, 1e-9), result))
+
+        print('total {} nodes in {:.2f}s, {:.0f} nodes per second'.format(totalNodes, totalTime, totalNodes / max(totalTime, 1e-9)))
+
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+        return passed
+
+
+    def stateErrors(game : Chess) -> list:
+        """
+        Returns the names of the incrementally updated parts of a position that differ from the
+        same position set up from scratch, empty if every part matches: the material value, the
+        hash, the piece-square scores and phase, the checks, the attack map, and the square and
+        piece list indexes
+        - game: position to check
+        """
+        fresh = Chess(fen=game.toFEN())
+        errors = []
+
+        for name in ('value', 'hash', 'middlegame', 'endgame', 'phase', 'whiteInCheck', 'blackInCheck'):
+            if getattr(game, name) != getattr(fresh, name):
+                errors.append(name)
+
+        for name in ('attacks', 'whiteSquares', 'blackSquares', 'sliders'):
+            if getattr(game.attackMap, name) != getattr(fresh.attackMap, name):
+                errors.append('attack map ' + name)
+
+        if game.attackMap.attackedBy(True) != fresh.attackMap.attackedBy(True) or game.attackMap.attackedBy(False) != fresh.attackMap.attackedBy(False):
+            errors.append('attacked squares')
+
+        # Every piece is on its board square, at its index in its list, and nothing else is indexed
+        pieces = game.whitePieces + game.blackPieces
+        indexed = all(p.index == i for pieces in (game.whitePieces, game.blackPieces) for i, p in enumerate(pieces))
+        placed = all(game.squares[p.y * Chess.BOARD_SIZE + p.x] is p and game.board[p.y][p.x] == p.type for p in pieces)
+        if not indexed or not placed or sum(p is not None for p in game.squares) != len(pieces):
+            errors.append('piece indexes')
+
+        if sorted((p.type, p.x, p.y) for p in pieces) != sorted((p.type, p.x, p.y) for p in fresh.whitePieces + fresh.blackPieces):
+            errors.append('pieces')
+
+        return errors
+
+
+    def checkIncremental(games : int, plies : int, seed : int = 0) -> bool:
+        """
+        Plays random sequences of moves and takebacks from every suite position, comparing the
+        incrementally updated state against a from-scratch setup after each one, and prints the
+        result for each position. Returns True if every state matches.
+        - games: random sequences to play from each position
+        - plies: most moves on the board in a sequence before it is taken back
+        - seed: random seed, so a failing sequence can be replayed
+        """
+        generator = random.Random(seed)
+        passed = True
+
+        for name, fen, counts in Perft.SUITE:
+            checked = 0
+            failures = []
+
+            for i in range(games):
+                game = Chess.fromFEN(fen)
+                played = 0
+
+                # Move forward most of the time, sometimes taking a move back, then take every move back
+                while played < plies:
+                    moves = game.legalMoves()
+                    if game.undoStack and (not moves or generator.random() < 0.25):
+                        game.unmakeMove()
+                    elif moves:
+                        game.makeMove(generator.choice(moves))
+                        played += 1
+                    else:
+                        break
+
+                    errors = Perft.stateErrors(game)
+                    checked += 1
+                    if errors:
+                        failures.append((game.toFEN(), errors))
+
+                while game.undoStack:
+                    game.unmakeMove()
+                    errors = Perft.stateErrors(game)
+                    checked += 1
+                    if errors:
+                        failures.append((game.toFEN(), errors))
+
+            passed = passed and not failures
+            print('{:36s} {:>6d} states  {}'.format(name, checked, 'FAIL' if failures else 'ok'))
+
+            for failedFen, errors in failures[:5]:
+                print('    {}: {}'.format(failedFen, ', '.join(errors)))
+
+        return passed
+
+
+
+def perftSubtree(item : tuple) -> tuple:
+    """
+    Counts the nodes below one root move in a worker process, returning (move, nodes, process id)
+    - item: (FEN of the position, encoded move, depth below the move)
+    """
+    fen, move, depth = item
+
+    game = Chess(fen=fen)
+    game.makeMove(move)
+
+    return (move, Perft.perft(game, depth), os.getpid())
+
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Count legal move tree nodes and measure move generation speed')
+    parser.add_argument('--fen', default=None, help='position to search, the initial position by default')
+    parser.add_argument('--depth', type=int, default=4, help='plies to search, or deepest suite depth to run')
+    parser.add_argument('--divide', action='store_true', help='print the node count below each move')
+    parser.add_argument('--suite', action='store_true', help='check the standard positions with known node counts')
+    parser.add_argument('--processes', type=int, default=1, help='worker processes to split the root moves over')
+    parser.add_argument('--check', action='store_true', help='check the incrementally updated state over random moves from the standard positions')
+    parser.add_argument('--games', type=int, default=10, help='random move sequences to check from each position')
+    parser.add_argument('--plies', type=int, default=40, help='most moves on the board in a checked sequence')
+    parser.add_argument('--seed', type=int, default=0, help='random seed of the checked sequences')
+    args = parser.parse_args()
+
+    # Dividing needs a move to divide on
+    if (args.divide or args.processes > 1) and args.depth < 1 and not args.suite and not args.check:
+        parser.error('--divide and --processes need a depth of at least 1')
+
+    # Check the incremental updates of makeMove and unmakeMove against recomputation
+    if args.check:
+        if not Perft.checkIncremental(args.games, args.plies, args.seed):
+            raise SystemExit(1)
+        return
+
+    # Check move generation against the known counts
+    if args.suite:
+        if not Perft.runSuite(args.depth, args.processes):
+            raise SystemExit(1)
+        return
+
+    game = Chess(fen=args.fen)
+
+    start = time.perf_counter()
+    workerNodes = None
+
+    if args.processes > 1:
+        with multiprocessing.Pool(args.processes) as pool:
+            counts, workerNodes = Perft.parallelDivide(game, args.depth, pool)
+    elif args.divide:
+        counts = Perft.divide(game, args.depth)
+    else:
+        counts = {'': Perft.perft(game, args.depth)}
+
+    elapsed = time.perf_counter() - start
+    nodes = sum(counts.values())
+
+    if args.divide:
+        for move, count in sorted(counts.items()):
+            print(move, count)
+
+    # Share of the work done by each worker
+    if workerNodes is not None:
+        for worker, count in sorted(workerNodes.items()):
+            print('worker {} nodes {}'.format(worker, count))
+
+    print('depth {} nodes {} time {:.2f}s nps {:.0f}'.format(args.depth, nodes, elapsed, nodes / max(elapsed, 1e-9)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import argparse
+import re
+import sys
+import time
+from typing import Iterator
+
+from Chess import Chess
+from Move import Move
+
+
+class PgnReader:
+    """
+    Streams games from Portable Game Notation files and replays them through the Chess rules engine.
+    Files are read a line at a time and games are yielded one by one, so memory use doesn't grow
+    with the size of the archive. Games are yielded in the form (tags, SAN moves, result).
+    Castling is not part of the rules, so games that castle can't be replayed.
+    """
+
+    # A tag pair such as [White "Kasparov, Garry"]
+    TAG = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+
+    # One movetext token, comments and variations are single characters so they can be skipped
+    TOKEN = re.compile(r'\s*([{}();]|[^\s{}();]+)')
+
+    # Move number in front of a move, such as 12. or 12...
+    MOVE_NUMBER = re.compile(r'\d+\.+')
+
+    # Standard algebraic notation: piece, origin file and rank, target square and promotion
+    SAN = re.compile(r'([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?[+#]?[!?]*$')
+
+    RESULTS = {'1-0', '0-1', '1/2-1/2', '*'}
+
+    # Absolute PieceType values of the SAN piece letters, pawns have no letter
+    PIECE_LETTERS = {None: 1, 'N': 2, 'B': 3, 'R': 4, 'Q': 5, 'K': 6}
+
+
+    def readFile(path : str) -> Iterator[tuple]:
+        """
+        Yields the games of a PGN file, '-' reads from standard input
+        - path: file to read
+        """
+        if path == '-':
+            yield from PgnReader.readGames(sys.stdin)
+            return
+
+        with open(path, encoding='utf-8', errors='replace') as lines:
+            yield from PgnReader.readGames(lines)
+
+
+    def readGames(lines) -> Iterator[tuple]:
+        """
+        Yields (tags, SAN moves, result) for every game in the lines of a PGN file. Comments,
+        variations, numeric annotations and move numbers are dropped.
+        - lines: iterable of text lines, such as an open file
+        """
+        tags = {}
+        moves = []
+        inComment = False
+        variationDepth = 0
+
+        for line in lines:
+
+            # Escaped lines are ignored
+            if line.startswith('%'):
+                continue
+
+            # A tag pair outside of the movetext, which starts a new game if moves were read
+            if not inComment and not variationDepth and line.lstrip().startswith('['):
+                if moves:
+                    yield (tags, moves, '*')
+                    tags, moves = {}, []
+
+                for name, value in PgnReader.TAG.findall(line):
+                    tags[name] = value.replace('\\"', '"').replace('\\\\', '\\')
+                continue
+
+            position = 0
+            while position < len(line):
+
+                # Skip to the end of a brace comment, which can span lines
+                if inComment:
+                    end = line.find('}', position)
+                    if end < 0:
+                        break
+                    inComment = False
+                    position = end + 1
+                    continue
+
+                match = PgnReader.TOKEN.match(line, position)
+                if match is None:
+                    break
+                token = match.group(1)
+                position = match.end()
+
+                if token == '{':
+                    inComment = True
+
+                # Rest of line comment
+                elif token == ';':
+                    break
+
+                # Variations can be nested and are skipped
+                elif token == '(':
+                    variationDepth += 1
+                elif token == ')':
+                    variationDepth = max(0, variationDepth - 1)
+                elif variationDepth:
+                    continue
+
+                # The result ends the game
+                elif token in PgnReader.RESULTS:
+                    yield (tags, moves, token)
+                    tags, moves = {}, []
+
+                # Numeric annotation glyph
+                elif token[0] == '$':
+                    continue
+
+                else:
+                    # Move numbers may be written against the move, such as 1.e4
+                    number = PgnReader.MOVE_NUMBER.match(token)
+                    if number:
+                        token = token[number.end():]
+                    if token:
+                        moves.append(token)
+
+        # Last game of a file without a result
+        if moves or tags:
+            yield (tags, moves, '*')
+
+
+    def startPosition(tags : dict) -> Chess:
+        """
+        Returns the position a game starts from, the FEN tag if it has one
+        - tags: tag pairs of the game
+        """
+        return Chess(fen=tags.get('FEN'))
+
+
+    def isCastling(san : str) -> bool:
+        """
+        Returns True if a SAN move castles
+        """
+        return san.startswith('O-O') or san.startswith('0-0')
+
+
+    def resolveSan(game : Chess, san : str) -> int:
+        """
+        Returns the encoded legal move a SAN move stands for. Raises ValueError if the move is
+        castling, can't be read, or doesn't match exactly one legal move.
+        - game: position the move is played in
+        - san: the move, such as e4, Nbd7, exd6 or e8=Q+
+        """
+        if PgnReader.isCastling(san):
+            raise ValueError('Castling is not part of the rules: ' + san)
+
+        match = PgnReader.SAN.match(san)
+        if match is None:
+            raise ValueError('Unreadable move: ' + san)
+
+        pieceLetter, fromFile, fromRank, target, promotionLetter = match.groups()
+        pieceType = PgnReader.PIECE_LETTERS[pieceLetter]
+        promotion = PgnReader.PIECE_LETTERS[promotionLetter] if promotionLetter else 0
+
+        # Squares are y * 8 + x with rank 8 at the top
+        targetSquare = (8 - int(target[1])) * 8 + 'abcdefgh'.index(target[0])
+        fromX = 'abcdefgh'.index(fromFile) if fromFile else -1
+        fromY = 8 - int(fromRank) if fromRank else -1
+
+        board = game.board
+        found = 0
+
+        for move in game.legalMoves():
+
+            if (move >> 6) & 63 != targetSquare or move >> Move.PROMOTION_SHIFT != promotion:
+                continue
+
+            oldSquare = move & 63
+            oldX, oldY = oldSquare & 7, oldSquare >> 3
+
+            if abs(board[oldY][oldX]) != pieceType or (fromX >= 0 and oldX != fromX) or (fromY >= 0 and oldY != fromY):
+                continue
+
+            if found:
+                raise ValueError('Ambiguous move: ' + san)
+            found = move
+
+        if not found:
+            raise ValueError('Illegal move: ' + san)
+
+        return found
+
+
+    def replay(tags : dict, moves : list) -> Iterator[tuple]:
+        """
+        Plays the moves of a game, yielding the game and the encoded move after every ply.
+        Raises ValueError on a move that can't be played.
+        - tags: tag pairs of the game, for the starting position
+        - moves: SAN moves of the game
+        """
+        game = PgnReader.startPosition(tags)
+
+        for san in moves:
+            move = PgnReader.resolveSan(game, san)
+            game.makeMove(move)
+            yield (game, move)
+
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Replay the games of a PGN file through the rules engine')
+    parser.add_argument('file', help="PGN file to read, '-' for standard input")
+    parser.add_argument('--limit', type=int, default=None, help='stop after this many games')
+    args = parser.parse_args()
+
+    games = 0
+    plies = 0
+    castling = 0
+    errors = 0
+
+    start = time.perf_counter()
+
+    for tags, moves, result in PgnReader.readFile(args.file):
+
+        if args.limit is not None and games + castling + errors >= args.limit:
+            break
+
+        # Castling can't be played, skip the game before replaying any of it
+        if any(PgnReader.isCastling(san) for san in moves):
+            castling += 1
+            continue
+
+        try:
+            played = sum(1 for ply in PgnReader.replay(tags, moves))
+        except ValueError as error:
+            errors += 1
+            print('skipped game', games + castling + errors, '-', error, file=sys.stderr)
+            continue
+
+        games += 1
+        plies += played
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    print('replayed {} games, {} plies in {:.2f}s, {:.1f} games/s, {:.0f} plies/s'.format(games, plies, elapsed, games / elapsed, plies / elapsed))
+    print('skipped {} games with castling, {} with unplayable moves'.format(castling, errors))
+
+if __name__ == "__main__":
+    main()
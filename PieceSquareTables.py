@@ -0,0 +1,125 @@
+class PieceSquareTables:
+    """
+    Positional bonuses in centipawns for each piece on each square, shared by the evaluators.
+    Tables are written from white's view with index y * 8 + x, so the first row is the eighth
+    rank. Black pieces read them mirrored top to bottom, square ^ 56, with the sign flipped.
+    Middlegame and endgame tables are blended by the game phase, from PHASE_WEIGHTS.
+    - MIDDLEGAME: signed bonuses indexed [PieceType value + 6][square]
+    - ENDGAME: signed bonuses indexed [PieceType value + 6][square]
+    """
+
+    PAWN = [
+          0,   0,   0,   0,   0,   0,   0,   0,
+         50,  50,  50,  50,  50,  50,  50,  50,
+         10,  10,  20,  30,  30,  20,  10,  10,
+          5,   5,  10,  25,  25,  10,   5,   5,
+          0,   0,   0,  20,  20,   0,   0,   0,
+          5,  -5, -10,   0,   0, -10,  -5,   5,
+          5,  10,  10, -20, -20,  10,  10,   5,
+          0,   0,   0,   0,   0,   0,   0,   0,
+    ]
+
+    # Pawns are worth pushing in the endgame whatever their file
+    PAWN_ENDGAME = [
+          0,   0,   0,   0,   0,   0,   0,   0,
+         80,  80,  80,  80,  80,  80,  80,  80,
+         50,  50,  50,  50,  50,  50,  50,  50,
+         30,  30,  30,  30,  30,  30,  30,  30,
+         20,  20,  20,  20,  20,  20,  20,  20,
+         10,  10,  10,  10,  10,  10,  10,  10,
+         10,  10,  10,  10,  10,  10,  10,  10,
+          0,   0,   0,   0,   0,   0,   0,   0,
+    ]
+
+    KNIGHT = [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20,   0,   0,   0,   0, -20, -40,
+        -30,   0,  10,  15,  15,  10,   0, -30,
+        -30,   5,  15,  20,  20,  15,   5, -30,
+        -30,   0,  15,  20,  20,  15,   0, -30,
+        -30,   5,  10,  15,  15,  10,   5, -30,
+        -40, -20,   0,   5,   5,   0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ]
+
+    BISHOP = [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,  10,  10,   5,   0, -10,
+        -10,   5,   5,  10,  10,   5,   5, -10,
+        -10,   0,  10,  10,  10,  10,   0, -10,
+        -10,  10,  10,  10,  10,  10,  10, -10,
+        -10,   5,   0,   0,   0,   0,   5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ]
+
+    ROOK = [
+          0,   0,   0,   0,   0,   0,   0,   0,
+          5,  10,  10,  10,  10,  10,  10,   5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+          0,   0,   0,   5,   5,   0,   0,   0,
+    ]
+
+    QUEEN = [
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,   5,   5,   5,   0, -10,
+         -5,   0,   5,   5,   5,   5,   0,  -5,
+          0,   0,   5,   5,   5,   5,   0,  -5,
+        -10,   5,   5,   5,   5,   5,   0, -10,
+        -10,   0,   5,   0,   0,   0,   0, -10,
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+    ]
+
+    # The king hides behind its pawns while queens and rooks are on the board
+    KING = [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+         20,  20,   0,   0,   0,   0,  20,  20,
+         20,  30,  10,   0,   0,  10,  30,  20,
+    ]
+
+    # and walks to the centre once they are gone
+    KING_ENDGAME = [
+        -50, -40, -30, -20, -20, -30, -40, -50,
+        -30, -20, -10,   0,   0, -10, -20, -30,
+        -30, -10,  20,  30,  30,  20, -10, -30,
+        -30, -10,  30,  40,  40,  30, -10, -30,
+        -30, -10,  30,  40,  40,  30, -10, -30,
+        -30, -10,  20,  30,  30,  20, -10, -30,
+        -30, -30,   0,   0,   0,   0, -30, -30,
+        -50, -30, -30, -30, -30, -30, -30, -50,
+    ]
+
+    # Contribution of each piece to the game phase, indexed by the absolute PieceType value.
+    # The starting position has MAX_PHASE, a board of kings and pawns has 0.
+    PHASE_WEIGHTS = [0, 0, 1, 1, 2, 4, 0]
+    MAX_PHASE = 24
+
+
+    def signedTables(tables : list) -> list:
+        """
+        Returns bonuses indexed [PieceType value + 6][square] from white's view, black pieces
+        reading the white table mirrored with the sign flipped
+        - tables: white tables indexed by the absolute PieceType value, None for no piece
+        """
+        signed = [[0] * 64 for piece in range(13)]
+
+        for kind in range(1, 7):
+            for square in range(64):
+                signed[kind + 6][square] = tables[kind][square]
+                signed[6 - kind][square] = -tables[kind][square ^ 56]
+
+        return signed
+
+
+    MIDDLEGAME = signedTables([None, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING])
+    ENDGAME = signedTables([None, PAWN_ENDGAME, KNIGHT, BISHOP, ROOK, QUEEN, KING_ENDGAME])
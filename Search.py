@@ -0,0 +1,690 @@
+import argparse
+import multiprocessing
+import os
+import time
+
+from Chess import Chess
+from Move import Move
+from Tablebase import Tablebase
+from TranspositionTable import TranspositionTable
+
+
+# Transposition table, the megabytes it was made for, and tablebase of a root split worker
+# process, kept between its root moves, and the generation counter of its SearchPool
+WORKER_TABLE = None
+WORKER_MEGABYTES = None
+WORKER_TABLEBASE = None
+WORKER_GENERATION = None
+
+
+class SearchStopped(Exception):
+    """
+    Raised inside the search when the time limit runs out or the search is stopped
+    """
+
+
+
+class Search:
+    """
+    Chooses a move for a Chess position with iterative deepening alpha-beta search. Leaves are
+    resolved by a quiescence search on captures. Moves are generated in stages so a cutoff skips
+    the rest: the previous principal variation or the transposition table move, captures by
+    MVV-LVA, then quiet moves ordered by killer moves and the history heuristic.
+    - game: position to search, left unchanged once a search returns
+    - table: TranspositionTable of results, kept between searches
+    - tablebase: Tablebase giving exact results once few pieces are left, or None
+    - nodes: positions visited by the last search
+    - iterations: (depth, score, nodes, seconds, principal variation) for every completed depth
+    """
+
+    INFINITY = 1000000
+    MATE = 100000
+    MAX_PLY = 128
+
+    # Piece values in centipawns indexed by the absolute PieceType value
+    PIECE_VALUES = [0, 100, 300, 300, 500, 900, 10000]
+
+    # Ordering scores, hash move first, then captures, then killers, then quiet moves by history
+    PV_MOVE_SCORE = 1 << 30
+    CAPTURE_SCORE = 1 << 28
+    KILLER_SCORE = 1 << 27
+
+    # Moves a side is expected to still have to play when sharing out its clock
+    MOVES_TO_GO = 30
+
+    def __init__(self, game : Chess, table : TranspositionTable = None, tablebase : Tablebase = None) -> None:
+        """
+        Creates a search of a game
+        - game: position to search
+        - table: transposition table to use, a new 16 MB table if None
+        - tablebase: endgame tables to look positions up in, None to search them
+        """
+        self.game = game
+        self.table = table if table is not None else TranspositionTable()
+        self.tablebase = tablebase
+
+        # Search statistics
+        self.nodes = 0
+        self.iterations = []
+        self.score = 0
+
+        # Move ordering state, kept between searches of the same game
+        self.killers = [[0, 0] for _ in range(Search.MAX_PLY)]
+        self.history = [0] * 4096
+
+        # Principal variation found at each ply, and the one from the previous iteration
+        self.pv = [[] for _ in range(Search.MAX_PLY + 1)]
+        self.previousPv = []
+        self.followPv = False
+
+        # Stopping conditions
+        self.deadline = None
+        self.stopped = False
+
+        # Nodes searched by each worker process in the last root split search, keyed by process id,
+        # and the pool of the running root split search
+        self.workerNodes = {}
+        self.pool = None
+
+        # In a root split worker, (shared generation counter, generation of the root move), the
+        # search stopping once the counter moves on. None elsewhere.
+        self.generation = None
+
+        # Callbacks told about every completed iteration, see addIterationListener
+        self.iterationListeners = []
+
+
+    def timeBudget(clock : float, increment : float = 0, movesToGo : int = None) -> float:
+        """
+        Returns the time to search a move for: the clock shared over the moves to go plus the
+        increment, never more than half of the clock
+        - clock: time left on the clock
+        - increment: time added to the clock after the move, in the same unit
+        - movesToGo: moves to play before the clock is refilled, MOVES_TO_GO if None
+        """
+        return min(clock / (movesToGo or Search.MOVES_TO_GO) + increment, clock / 2)
+
+
+    def search(self, maxDepth : int = 64, timeLimit : float = None) -> tuple:
+        """
+        Searches the position with iterative deepening and returns (best move, principal variation).
+        The best move is 0 if the side to move has no legal moves.
+        - maxDepth: deepest iteration to search
+        - timeLimit: seconds to search for, None to only stop at maxDepth. The first iteration
+          always completes so there is a move to return.
+        """
+        start = time.perf_counter()
+        self.deadline = start + timeLimit if timeLimit is not None else None
+        self.stopped = False
+        self.nodes = 0
+        self.iterations = []
+        self.previousPv = []
+
+        rootMoves = len(self.game.undoStack)
+        bestMove = 0
+        pv = []
+
+        self.table.newSearch()
+
+        for depth in range(1, maxDepth + 1):
+
+            self.followPv = True
+
+            try:
+                score = self.alphaBeta(depth, 0, -Search.INFINITY, Search.INFINITY)
+
+            # Out of time, take back the moves of the unfinished iteration and keep the last result
+            except SearchStopped:
+                while len(self.game.undoStack) > rootMoves:
+                    self.game.unmakeMove()
+                break
+
+            pv = self.pv[0]
+            self.previousPv = pv
+            self.score = score
+            bestMove = pv[0] if pv else 0
+            self.iterations.append((depth, score, self.nodes, time.perf_counter() - start, pv))
+
+            for listener in self.iterationListeners:
+                listener(*self.iterations[-1])
+
+            # Nothing to search, or a forced mate was found
+            if not pv or abs(score) >= Search.MATE - Search.MAX_PLY:
+                break
+
+        return (bestMove, pv)
+
+
+    def searchRootSplit(self, maxDepth : int, processes : int = None, timeLimit : float = None, pool : 'SearchPool' = None) -> tuple:
+        """
+        Searches the position by splitting its root moves over a process pool and returns
+        (best move, principal variation). Each depth is a round in which every root move is
+        searched to the same depth, so scores are only compared between moves searched equally
+        deep. Workers get the position as FEN with the hashes of the earlier positions, keep their
+        transposition table between rounds, each an equal share of the size of this search's table,
+        and the best score of the last completed round wins.
+        The first round always completes, after that stop or the time limit end the search at once
+        and cancel the root moves still queued or running. A search stopped in the first round
+        returns the best move it finished.
+        - maxDepth: deepest round to search, including the root move
+        - processes: worker processes of a pool made for this search, the number of cores if None
+        - timeLimit: seconds to search for, None to only stop at maxDepth
+        - pool: SearchPool to search on, kept running afterwards, or None to make one for this search
+        """
+        start = time.perf_counter()
+        self.deadline = start + timeLimit if timeLimit is not None else None
+        self.stopped = False
+        self.nodes = 0
+        self.iterations = []
+        self.workerNodes = {}
+
+        game = self.game
+        moves = self.orderMoves(game.legalMoves(), 0, 0)
+        if not moves:
+            self.score = -Search.MATE if self.inCheck() else 0
+            return (0, [])
+
+        ownPool = pool is None
+        if ownPool:
+            pool = SearchPool(processes or os.cpu_count())
+
+        fen = game.toFEN()
+        # The workers share the table's memory budget, so Hash stays the memory of the whole search
+        megabytes = self.table.size() / (1 << 20) / pool.processes
+        tablebase = (self.tablebase.directory, self.tablebase.maxPieces) if self.tablebase is not None else None
+        generation = pool.generation.value
+
+        bestMove, pv = moves[0], [moves[0]]
+
+        self.pool = pool
+        try:
+            for depth in range(1, maxDepth + 1):
+                pending = [(move, pool.pool.apply_async(searchRootMove, ((fen, game.hashHistory, move, depth - 1, megabytes, tablebase, generation),))) for move in moves]
+                results = {}
+
+                # Wait for the round, giving up on it if the search is stopped or, after the first round, out of time
+                while pending and not (self.stopped or (self.iterations and self.deadline is not None and time.perf_counter() > self.deadline)):
+                    pending[0][1].wait(0.01)
+
+                    for entry in [entry for entry in pending if entry[1].ready()]:
+                        move, score, nodes, line, worker = entry[1].get()
+                        pending.remove(entry)
+
+                        # A root move cancelled by stop has no score
+                        if score is not None:
+                            results[move] = (score, line)
+                        self.nodes += nodes
+                        self.workerNodes[worker] = self.workerNodes.get(worker, 0) + nodes
+
+                # Stopped in the first round, take the best of the moves finished so far
+                if pending or len(results) < len(moves):
+                    if not self.iterations and results:
+                        bestMove = max(results, key=lambda move: results[move][0])
+                        self.score, line = results[bestMove]
+                        pv = [bestMove] + line
+                    break
+
+                # Highest score wins, ties go to the move ordered first. The next round starts with the best moves.
+                moves.sort(key=lambda move: -results[move][0])
+                bestMove = moves[0]
+                score, line = results[bestMove]
+                pv = [bestMove] + line
+
+                self.score = score
+                self.iterations.append((depth, score, self.nodes, time.perf_counter() - start, pv))
+
+                for listener in self.iterationListeners:
+                    listener(*self.iterations[-1])
+
+                if abs(score) >= Search.MATE - Search.MAX_PLY:
+                    break
+        finally:
+            # Root moves of an unfinished round mustn't hold up the next search on the pool
+            pool.cancel()
+            self.pool = None
+            if ownPool:
+                pool.close()
+
+        return (bestMove, pv)
+
+
+    def addIterationListener(self, listener) -> None:
+        """
+        Registers a callback for the iterations of search. It is called after each completed depth
+        as listener(depth, score, nodes, seconds, principal variation), from the searching thread.
+        - listener: callable to register
+        """
+        self.iterationListeners.append(listener)
+
+
+    def removeIterationListener(self, listener) -> None:
+        """
+        Unregisters a callback added with addIterationListener
+        - listener: callable to remove
+        """
+        self.iterationListeners.remove(listener)
+
+
+    def stop(self) -> None:
+        """
+        Stops a running search, which returns the result of the last completed iteration. A root
+        split search has its root moves on the pool cancelled.
+        """
+        self.stopped = True
+
+        pool = self.pool
+        if pool is not None:
+            pool.cancel()
+
+
+    def checkStop(self) -> None:
+        """
+        Raises SearchStopped if the search was stopped or is out of time. The first iteration always runs.
+        """
+        if not self.iterations:
+            return
+
+        if self.stopped or (self.deadline is not None and time.perf_counter() > self.deadline):
+            raise SearchStopped()
+
+        if self.generation is not None and self.generation[0].value != self.generation[1]:
+            raise SearchStopped()
+
+
+    def evaluate(self) -> int:
+        """
+        Returns the static evaluation in centipawns from the view of the side to move, kept up to
+        date by the game on every move
+        """
+        score = self.game.evaluation()
+        return score if self.game.whiteTurn else -score
+
+
+    def inCheck(self) -> bool:
+        """
+        Returns True if the side to move is in check
+        """
+        return self.game.whiteInCheck if self.game.whiteTurn else self.game.blackInCheck
+
+
+    def alphaBeta(self, depth : int, ply : int, alpha : int, beta : int) -> int:
+        """
+        Returns the score of the position from the view of the side to move with fail-soft alpha-beta
+        - depth: remaining plies to search before the quiescence search
+        - ply: distance from the root
+        - alpha: score the side to move is already guaranteed
+        - beta: score the opponent is already guaranteed
+        """
+        self.pv[ply] = []
+
+        # A repeated position or fifty moves without progress is a draw, repeating once is enough
+        # since the side that repeated could do it again
+        if ply > 0 and (self.game.halfMoveClock >= 100 or self.game.isRepetition()):
+            return 0
+
+        # Positions in the endgame tables have an exact result, wins and losses scored as mates
+        if ply > 0 and self.tablebase is not None:
+            entry = self.tablebase.probe(self.game)
+            if entry is not None:
+                result, plies = entry
+                return result * (Search.MATE - ply - plies) if result else 0
+
+        inCheck = self.inCheck()
+
+        # Search one ply deeper when in check so mates aren't cut off at the horizon
+        if inCheck:
+            depth += 1
+
+        if depth <= 0 or ply >= Search.MAX_PLY - 1:
+            return self.quiescence(ply, alpha, beta)
+
+        self.nodes += 1
+        if self.nodes & 1023 == 0:
+            self.checkStop()
+
+        game = self.game
+
+        # Use a stored result if it was searched deep enough, and its best move either way
+        hashMove = 0
+        entry = self.table.probe(game.hash)
+        if entry is not None:
+            entryDepth, bound, score, hashMove = entry
+
+            if ply > 0 and entryDepth >= depth:
+                score = self.scoreFromTable(score, ply)
+
+                if bound == TranspositionTable.EXACT or (bound == TranspositionTable.LOWER and score >= beta) or (bound == TranspositionTable.UPPER and score <= alpha):
+                    if hashMove:
+                        self.pv[ply] = [hashMove]
+                    return score
+
+        # Follow the principal variation of the previous iteration first, then the table's move
+        pvMove = hashMove
+        if self.followPv:
+            if ply < len(self.previousPv):
+                pvMove = self.previousPv[ply]
+            else:
+                self.followPv = False
+
+        originalAlpha = alpha
+        bestScore = -Search.INFINITY
+        bestMove = 0
+
+        for move in self.stagedMoves(ply, pvMove):
+
+            game.makeMove(move)
+            score = -self.alphaBeta(depth - 1, ply + 1, -beta, -alpha)
+            game.unmakeMove()
+
+            # Only the first move of a principal variation node continues the previous variation
+            self.followPv = False
+
+            if score > bestScore:
+                bestScore = score
+                bestMove = move
+
+            if score > alpha:
+                alpha = score
+                self.pv[ply] = [move] + self.pv[ply + 1]
+
+                # Beta cutoff, remember quiet moves that caused it
+                if alpha >= beta:
+                    if not move & Move.CAPTURE:
+                        self.storeKiller(move, ply)
+                        self.history[move & 4095] += depth * depth
+                    break
+
+        # Checkmate or stalemate, nearer mates score higher
+        if not bestMove:
+            return -Search.MATE + ply if inCheck else 0
+
+        # Store the result with the kind of bound it is
+        if bestScore <= originalAlpha:
+            bound = TranspositionTable.UPPER
+        elif bestScore >= beta:
+            bound = TranspositionTable.LOWER
+        else:
+            bound = TranspositionTable.EXACT
+
+        self.table.store(game.hash, depth, bound, self.scoreToTable(bestScore, ply), bestMove)
+
+        return bestScore
+
+
+    def scoreToTable(self, score : int, ply : int) -> int:
+        """
+        Converts a mate score from distance to the root to distance from the position, for storing
+        """
+        if score >= Search.MATE - Search.MAX_PLY:
+            return score + ply
+        if score <= -Search.MATE + Search.MAX_PLY:
+            return score - ply
+        return score
+
+
+    def scoreFromTable(self, score : int, ply : int) -> int:
+        """
+        Converts a stored mate score back to distance from the root
+        """
+        if score >= Search.MATE - Search.MAX_PLY:
+            return score - ply
+        if score <= -Search.MATE + Search.MAX_PLY:
+            return score + ply
+        return score
+
+
+    def quiescence(self, ply : int, alpha : int, beta : int) -> int:
+        """
+        Returns the score of the position once captures have been played out. The side to move can
+        stand on the static evaluation, unless it is in check, in which case every move is searched.
+        - ply: distance from the root
+        - alpha: score the side to move is already guaranteed
+        - beta: score the opponent is already guaranteed
+        """
+        self.pv[ply] = []
+
+        self.nodes += 1
+        if self.nodes & 1023 == 0:
+            self.checkStop()
+
+        game = self.game
+        inCheck = self.inCheck()
+        bestScore = -Search.INFINITY
+
+        # Stand pat on the evaluation
+        if not inCheck:
+            bestScore = self.evaluate()
+
+            if bestScore >= beta or ply >= Search.MAX_PLY - 1:
+                return bestScore
+
+            if bestScore > alpha:
+                alpha = bestScore
+
+        # In check every move is searched, otherwise only captures and queen promotions
+        if inCheck:
+            moves = game.legalMoves()
+            if not moves:
+                return -Search.MATE + ply
+        else:
+            moves = [move for move in game.encodeMoves(game.tacticalMoves()) if move & Move.CAPTURE or Move.promotion(move) == Move.PROMOTIONS[0]]
+
+        for move in self.orderMoves(moves, ply, 0):
+
+            game.makeMove(move)
+            score = -self.quiescence(ply + 1, -beta, -alpha)
+            game.unmakeMove()
+
+            if score > bestScore:
+                bestScore = score
+
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+
+        return bestScore
+
+
+    def stagedMoves(self, ply : int, hashMove : int):
+        """
+        Yields the legal moves of the position in stages, so moves after a cutoff are never
+        generated, checked for legality or sorted: the hash move if it is legal, then captures and
+        promotions by MVV-LVA, then quiet moves by killer moves and history.
+        - ply: distance from the root, used for the killer moves
+        - hashMove: move to search first, 0 for none
+        """
+        game = self.game
+
+        if hashMove and game.isLegal(hashMove):
+            yield hashMove
+        else:
+            hashMove = 0
+
+        # Quiet moves are only generated once every tactical move has been searched without a cutoff
+        for generate in (game.tacticalMoves, game.quietMoves):
+            for move in self.orderMoves([move for move in game.encodeMoves(generate()) if move != hashMove], ply, 0):
+                yield move
+
+
+    def orderMoves(self, moves : list, ply : int, pvMove : int) -> list:
+        """
+        Returns the moves sorted so the most promising are searched first
+        - moves: encoded legal moves
+        - ply: distance from the root, used for the killer moves
+        - pvMove: move to search first, 0 for none
+        """
+        board = self.game.board
+        killers = self.killers[ply]
+        history = self.history
+        scored = []
+
+        for move in moves:
+
+            if move == pvMove:
+                score = Search.PV_MOVE_SCORE
+
+            # Most valuable victim first, least valuable attacker breaks ties
+            elif move & Move.CAPTURE:
+                newSquare = (move >> 6) & 63
+                oldSquare = move & 63
+                victim = abs(board[newSquare >> 3][newSquare & 7]) or 1
+                attacker = abs(board[oldSquare >> 3][oldSquare & 7])
+                score = Search.CAPTURE_SCORE + victim * 8 - attacker
+
+            elif move == killers[0] or move == killers[1]:
+                score = Search.KILLER_SCORE
+
+            else:
+                score = history[move & 4095]
+
+            # Promotions are searched before other moves of the same kind
+            if move >> Move.PROMOTION_SHIFT:
+                score += Search.PIECE_VALUES[move >> Move.PROMOTION_SHIFT]
+
+            scored.append((score, move))
+
+        scored.sort(reverse=True)
+
+        return [move for score, move in scored]
+
+
+    def storeKiller(self, move : int, ply : int) -> None:
+        """
+        Remembers a quiet move that caused a beta cutoff at a ply, keeping the two most recent
+        """
+        killers = self.killers[ply]
+
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+
+
+
+class SearchPool:
+    """
+    Process pool for root split searches, kept between searches so its workers start only once.
+    The workers share a generation counter with the pool. Cancelling moves the counter on, which
+    stops the root moves already queued or running, so the next search has the workers at once.
+    - processes: number of worker processes
+    """
+
+    def __init__(self, processes : int) -> None:
+        self.processes = processes
+        self.generation = multiprocessing.RawValue('i', 0)
+
+        # Wait for every worker to start, so the first search doesn't pay for it
+        started = multiprocessing.Semaphore(0)
+        self.pool = multiprocessing.Pool(processes, initializeWorker, (self.generation, started))
+        for worker in range(processes):
+            started.acquire()
+
+
+    def cancel(self) -> None:
+        """
+        Stops the root moves sent to the workers so far
+        """
+        self.generation.value += 1
+
+
+    def close(self) -> None:
+        """
+        Ends the worker processes
+        """
+        self.pool.terminate()
+        self.pool.join()
+
+
+
+def initializeWorker(generation, started) -> None:
+    """
+    Keeps the generation counter of the SearchPool a worker process belongs to and reports the
+    worker started
+    """
+    global WORKER_GENERATION
+    WORKER_GENERATION = generation
+    started.release()
+
+
+
+def searchRootMove(item : tuple) -> tuple:
+    """
+    Searches the position after one root move to a fixed depth in a worker process. Returns (move,
+    score from the view of the side playing the move, nodes, principal variation after the move,
+    process id). The score is None if the search was cancelled.
+    - item: (FEN of the root position, hashes of the positions before it, encoded move, depth below
+      the move, transposition table megabytes of this worker, (tablebase folder, most pieces) or None,
+      generation of the SearchPool the move was sent in)
+    """
+    global WORKER_TABLE, WORKER_MEGABYTES, WORKER_TABLEBASE
+    fen, hashHistory, move, depth, megabytes, tablebase, generation = item
+
+    # Cancelled while queued
+    if WORKER_GENERATION.value != generation:
+        return (move, None, 0, [], os.getpid())
+
+    if WORKER_TABLE is None or WORKER_MEGABYTES != megabytes:
+        # Free the old table before making the new one
+        WORKER_TABLE = None
+        WORKER_TABLE = TranspositionTable(megabytes)
+        WORKER_MEGABYTES = megabytes
+    if tablebase is not None and (WORKER_TABLEBASE is None or (WORKER_TABLEBASE.directory, WORKER_TABLEBASE.maxPieces) != tablebase):
+        WORKER_TABLEBASE = Tablebase(*tablebase)
+
+    # The earlier positions let the worker see repetitions of the game before the root
+    game = Chess(fen=fen)
+    game.hashHistory = list(hashHistory)
+    game.makeMove(move)
+    search = Search(game, WORKER_TABLE, WORKER_TABLEBASE if tablebase is not None else None)
+    search.generation = (WORKER_GENERATION, generation)
+
+    if depth > 0:
+        search.search(depth)
+        score, pv = search.score, search.iterations[-1][4] if search.iterations else []
+    else:
+        score, pv = search.quiescence(0, -Search.INFINITY, Search.INFINITY), []
+
+    # Cancelled while searching, the score is from an unfinished search
+    if WORKER_GENERATION.value != generation:
+        return (move, None, search.nodes, [], os.getpid())
+
+    # Scores come from the opponent's view, and mates are one ply further from the root
+    score = -score
+    if score >= Search.MATE - Search.MAX_PLY:
+        score -= 1
+    elif score <= -Search.MATE + Search.MAX_PLY:
+        score += 1
+
+    return (move, score, search.nodes, pv, os.getpid())
+
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Search a position for the best move')
+    parser.add_argument('--fen', default=None, help='position to search, the initial position by default')
+    parser.add_argument('--depth', type=int, default=5, help='deepest iteration to search')
+    parser.add_argument('--time', type=float, default=None, help='seconds to search for')
+    parser.add_argument('--hash', type=float, default=16, help='transposition table size in megabytes')
+    parser.add_argument('--processes', type=int, default=1, help='worker processes to split the root moves over')
+    parser.add_argument('--tablebases', default=None, help='folder of endgame tables to look up')
+    args = parser.parse_args()
+
+    game = Chess(fen=args.fen)
+    search = Search(game, TranspositionTable(args.hash), Tablebase(args.tablebases) if args.tablebases else None)
+
+    if args.processes > 1:
+        bestMove, pv = search.searchRootSplit(args.depth, args.processes, args.time)
+        for worker, nodes in sorted(search.workerNodes.items()):
+            print('worker {} nodes {}'.format(worker, nodes))
+    else:
+        bestMove, pv = search.search(args.depth, args.time)
+
+    # Time to depth and throughput of every iteration
+    for depth, score, nodes, seconds, line in search.iterations:
+        print('depth {} score {} nodes {} time {:.2f}s nps {:.0f} pv {}'.format(depth, score, nodes, seconds, nodes / max(seconds, 1e-9), ' '.join(Move.toString(move) for move in line)))
+
+    print('bestmove', Move.toString(bestMove) if bestMove else '(none)')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+import argparse
+import mmap
+import os
+import time
+
+from Chess import Chess, MOVE_GENERATORS, QUIET_GENERATORS, squareAttacked
+from Move import Move
+from PieceType import PieceType
+
+
+class TablePosition:
+    """
+    Placement of a table's pieces with the attributes the move generators of Chess read. Tables
+    have no en passant captures, so the pawns that just moved two squares are always empty.
+    - board: PieceType values indexed board[y][x]
+    """
+    __slots__ = ('board', 'twoWhitePawnMovement', 'twoBlackPawnMovement')
+
+    def __init__(self) -> None:
+        self.board = [[0] * Chess.BOARD_SIZE for y in range(Chess.BOARD_SIZE)]
+        self.twoWhitePawnMovement = []
+        self.twoBlackPawnMovement = []
+
+
+class Tablebase:
+    """
+    Endgame tablebases for positions with few pieces, solved by retrograde analysis with the move
+    rules of Chess. A table covers one set of pieces, named by the piece letters of white then
+    black such as KQK or KRKP, and stores one byte for every placement of the pieces and side to
+    move. The byte is 0 for a draw or an impossible placement, otherwise the number of plies to
+    checkmate plus one, the side to move winning when the plies are odd and losing when even.
+    Tables are stored for the stronger side as white, the other colour is read mirrored. Castling
+    is not part of the rules and positions with an en passant capture available are not covered.
+    - directory: folder the table files are read from and written to
+    - maxPieces: most pieces, kings included, a table is looked up for
+    """
+
+    # Piece letters from the strongest, a table lists each side's pieces in this order
+    LETTERS = 'KQRBNP'
+    PIECE_TYPES = {'K': 6, 'Q': 5, 'R': 4, 'B': 3, 'N': 2, 'P': 1}
+
+    # Marks a position with a move to a draw, which can never be lost
+    DRAWN = 255
+
+    def __init__(self, directory : str = 'tablebases', maxPieces : int = 4) -> None:
+        """
+        Creates a tablebase reading tables from a folder as they are needed
+        - directory: folder of the table files
+        - maxPieces: most pieces, kings included, to look up
+        """
+        self.directory = directory
+        self.maxPieces = maxPieces
+
+        # Loaded tables by name, None for tables without a file
+        self.tables = {}
+
+
+    def tableName(types : list) -> tuple:
+        """
+        Returns (table name, True if the colours are swapped) for a set of pieces
+        - types: PieceType values of the pieces
+        """
+        white = ''.join(sorted((Tablebase.LETTERS[6 - piece] for piece in types if piece > 0), key=Tablebase.LETTERS.index))
+        black = ''.join(sorted((Tablebase.LETTERS[6 + piece] for piece in types if piece < 0), key=Tablebase.LETTERS.index))
+
+        # The side with more pieces, then the stronger pieces, is white in the table
+        whiteStrength = (len(white), [-Tablebase.LETTERS.index(letter) for letter in white])
+        blackStrength = (len(black), [-Tablebase.LETTERS.index(letter) for letter in black])
+
+        if blackStrength > whiteStrength:
+            return (black + white, True)
+
+        return (white + black, False)
+
+
+    def tableTypes(name : str) -> list:
+        """
+        Returns the PieceType values of a table's pieces in index order
+        - name: table name such as KQK
+        """
+        split = name.index('K', 1)
+        return [Tablebase.PIECE_TYPES[letter] for letter in name[:split]] + [-Tablebase.PIECE_TYPES[letter] for letter in name[split:]]
+
+
+    def table(self, name : str, generate : bool = False):
+        """
+        Returns the bytes of a table, None if it has no complete file
+        - name: table name such as KQK
+        - generate: True to generate and save a missing table
+        """
+        if name in self.tables and (self.tables[name] is not None or not generate):
+            return self.tables[name]
+
+        path = os.path.join(self.directory, name + '.tb')
+        size = 2 << (6 * len(Tablebase.tableTypes(name)))
+
+        # A file of the wrong length, such as one cut short, is not a table
+        complete = os.path.exists(path) and os.path.getsize(path) == size
+
+        # Write to a temporary file moved into place once complete, so no reader ever maps a
+        # partly written table, even one generated by another process at the same time
+        if not complete and generate:
+            os.makedirs(self.directory, exist_ok=True)
+            data = self.generate(name)
+            temporary = '{}.{}.tmp'.format(path, os.getpid())
+            try:
+                with open(temporary, 'wb') as file:
+                    file.write(data)
+                os.replace(temporary, path)
+            except OSError:
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+                raise
+            complete = True
+
+        self.tables[name] = None
+        if complete:
+            with open(path, 'rb') as file:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(data) == size:
+                self.tables[name] = data
+            else:
+                data.close()
+
+        return self.tables[name]
+
+
+    def probePieces(self, pieces : list, whiteToMove : bool, generate : bool = False) -> int:
+        """
+        Returns the table byte of a position, or None if there is no table for its pieces
+        - pieces: (PieceType value, square) of every piece
+        - whiteToMove: True if white is to move
+        - generate: True to generate missing tables
+        """
+        types = [piece for piece, square in pieces]
+
+        # Kings alone can't mate
+        if all(abs(piece) == PieceType.WHITEKING.value for piece in types):
+            return 0
+
+        name, mirrored = Tablebase.tableName(types)
+        data = self.table(name, generate)
+        if data is None:
+            return None
+
+        if mirrored:
+            pieces = [(-piece, square ^ 56) for piece, square in pieces]
+            whiteToMove = not whiteToMove
+
+        # Put each piece in the slot of its type, pieces of the same type in any order
+        slots = {}
+        for piece, square in pieces:
+            slots.setdefault(piece, []).append(square)
+
+        index = 0 if whiteToMove else 1
+        for piece in reversed(Tablebase.tableTypes(name)):
+            index = (index << 6) | slots[piece].pop()
+
+        return data[index]
+
+
+    def probe(self, game : Chess) -> tuple:
+        """
+        Returns (result, plies to mate) for the side to move in a game, result being 1 for a win,
+        -1 for a loss and 0 for a draw, or None if the position isn't covered by a table
+        - game: position to look up
+        """
+        if len(game.whitePieces) + len(game.blackPieces) > self.maxPieces:
+            return None
+
+        # A pawn that just moved two squares only makes the position differ from the table's when
+        # an opponent pawn beside it can legally capture it en passant
+        if game.twoWhitePawnMovement or game.twoBlackPawnMovement:
+            if any(move & Move.EN_PASSANT for move in game.legalMoves()):
+                return None
+
+        pieces = [(p.type, p.y * Chess.BOARD_SIZE + p.x) for p in game.whitePieces + game.blackPieces]
+        value = self.probePieces(pieces, game.whiteTurn)
+
+        if value is None:
+            return None
+        if value == 0:
+            return (0, 0)
+
+        return (1 if (value - 1) & 1 else -1, value - 1)
+
+
+    def bestMove(self, game : Chess) -> int:
+        """
+        Returns the legal move keeping the best table result: the fastest win, else a draw, else
+        the slowest loss. Returns 0 if the position isn't covered or has no moves.
+        - game: position to pick a move for
+        """
+        if self.probe(game) is None:
+            return 0
+
+        bestMove = 0
+        bestRank = None
+
+        for move in game.legalMoves():
+            game.makeMove(move)
+            entry = self.probe(game)
+            game.unmakeMove()
+
+            if entry is None:
+                continue
+
+            # The opponent's result after the move, turned into a rank for the side to move
+            result, plies = entry
+            rank = (-result, plies if result > 0 else -plies)
+
+            if bestRank is None or rank > bestRank:
+                bestMove, bestRank = move, rank
+
+        return bestMove
+
+
+    def targets(position : TablePosition, piece : int, square : int) -> list:
+        """
+        Returns the (square, promotion) moves of a piece from the move generators of Chess,
+        captures included, ignoring checks
+        """
+        moves = []
+
+        for newX, newY, capture in MOVE_GENERATORS[piece](square & 7, square >> 3, position):
+            target = newY * Chess.BOARD_SIZE + newX
+
+            # Pawns reaching the last row promote to any piece
+            if abs(piece) == PieceType.WHITEPAWN.value and (newY == 0 or newY == Chess.BOARD_SIZE - 1):
+                moves.extend((target, promotion) for promotion in Move.PROMOTIONS)
+            else:
+                moves.append((target, 0))
+
+        return moves
+
+
+    def unmoveTargets(position : TablePosition, piece : int, square : int) -> list:
+        """
+        Returns the empty squares a piece could have moved to its square from without capturing
+        """
+        x, y = square & 7, square >> 3
+
+        if abs(piece) == PieceType.WHITEPAWN.value:
+            board = position.board
+            step = 1 if piece > 0 else -1
+            origins = []
+
+            # Pawns never stand on the first row of their side
+            if 1 <= y + step < Chess.BOARD_SIZE - 1 and board[y + step][x] == 0:
+                origins.append(square + step * Chess.BOARD_SIZE)
+                if y == (4 if piece > 0 else 3) and board[y + 2 * step][x] == 0:
+                    origins.append(square + 2 * step * Chess.BOARD_SIZE)
+
+            return origins
+
+        # Other pieces move the same way backwards, onto empty squares
+        return [newY * Chess.BOARD_SIZE + newX for newX, newY, capture in QUIET_GENERATORS[piece](x, y, position)]
+
+
+    def generate(self, name : str) -> bytearray:
+        """
+        Solves a table by retrograde analysis and returns its bytes. Tables its captures and
+        promotions lead to are generated first.
+        - name: table name such as KQK
+        """
+        types = Tablebase.tableTypes(name)
+        count = len(types)
+        sideShift = 6 * count
+        size = 2 << sideShift
+        whiteKing = types.index(PieceType.WHITEKING.value)
+        blackKing = types.index(PieceType.BLACKKING.value)
+
+        # Plies to mate plus one for every position, filled in by the retrograde pass
+        values = bytearray(size)
+
+        # Legal positions, and for each the moves staying in the table that aren't known to lose yet,
+        # DRAWN if it has a move to a draw. The slowest loss among its moves so far gives the
+        # plies to mate once every move is known to lose.
+        legal = bytearray(size)
+        remaining = bytearray(size)
+        slowestLoss = bytearray(size)
+
+        # Positions solved at each number of plies, wins at odd plies and losses at even plies
+        buckets = [[] for plies in range(256)]
+
+        position = TablePosition()
+        board = position.board
+
+        # First pass: find the legal positions, checkmates, and the results of moves that leave the table
+        for index in range(size):
+            squares = [(index >> (6 * i)) & 63 for i in range(count)]
+            whiteToMove = not index >> sideShift
+
+            if len(set(squares)) != count:
+                continue
+            if any(abs(piece) == PieceType.WHITEPAWN.value and (square < 8 or square >= 56) for piece, square in zip(types, squares)):
+                continue
+
+            for piece, square in zip(types, squares):
+                board[square >> 3][square & 7] = piece
+
+            # The side that just moved can't be in check
+            king = squares[blackKing if whiteToMove else whiteKing]
+            if not squareAttacked(board, king & 7, king >> 3, whiteToMove):
+                legal[index] = 1
+                ownKing = whiteKing if whiteToMove else blackKing
+
+                moves = 0
+                staying = 0
+                drawn = False
+                fastestWin = 255
+
+                for i, (piece, square) in enumerate(zip(types, squares)):
+                    if (piece > 0) != whiteToMove:
+                        continue
+
+                    for target, promotion in Tablebase.targets(position, piece, square):
+
+                        # Play the move and skip it if it leaves the king attacked
+                        x, y, targetX, targetY = square & 7, square >> 3, target & 7, target >> 3
+                        captured = board[targetY][targetX]
+                        board[y][x] = 0
+                        board[targetY][targetX] = piece
+                        king = target if i == ownKing else squares[ownKing]
+                        illegal = squareAttacked(board, king & 7, king >> 3, not whiteToMove)
+                        board[targetY][targetX] = captured
+                        board[y][x] = piece
+
+                        if illegal:
+                            continue
+
+                        moves += 1
+
+                        # Moves staying in the table are resolved by the retrograde pass
+                        if not captured and not promotion:
+                            staying += 1
+                            continue
+
+                        # Captures and promotions are looked up in the smaller tables
+                        pieces = []
+                        for j in range(count):
+                            if j == i:
+                                pieces.append(((promotion if piece > 0 else -promotion) if promotion else piece, target))
+                            elif squares[j] != target:
+                                pieces.append((types[j], squares[j]))
+
+                        value = self.probePieces(pieces, not whiteToMove, True)
+
+                        # The opponent draws, loses, or wins after the move
+                        if value == 0:
+                            drawn = True
+                        elif (value - 1) & 1 == 0:
+                            fastestWin = min(fastestWin, value)
+                        else:
+                            slowestLoss[index] = max(slowestLoss[index], value - 1)
+
+                if moves == 0:
+                    # Checkmate, or stalemate which stays a draw
+                    if squareAttacked(board, squares[ownKing] & 7, squares[ownKing] >> 3, not whiteToMove):
+                        buckets[0].append(index)
+                    else:
+                        remaining[index] = Tablebase.DRAWN
+                else:
+                    if fastestWin < 255:
+                        buckets[fastestWin].append(index)
+
+                    remaining[index] = Tablebase.DRAWN if drawn else min(staying, Tablebase.DRAWN - 1)
+
+                    # Every move leaves the table and loses
+                    if staying == 0 and not drawn and fastestWin == 255:
+                        buckets[slowestLoss[index] + 1].append(index)
+
+            for square in squares:
+                board[square >> 3][square & 7] = 0
+
+        # Retrograde pass: solve positions in order of plies to mate, working back through the moves leading to them
+        for plies in range(255):
+            for index in buckets[plies]:
+
+                if values[index]:
+                    continue
+                values[index] = plies + 1
+
+                if plies + 1 >= 255:
+                    continue
+
+                squares = [(index >> (6 * i)) & 63 for i in range(count)]
+                side = index >> sideShift
+                for piece, square in zip(types, squares):
+                    board[square >> 3][square & 7] = piece
+
+                # The side that just moved could have come from any square its piece reaches backwards
+                for i, (piece, square) in enumerate(zip(types, squares)):
+                    if (piece > 0) != bool(side):
+                        continue
+
+                    for origin in Tablebase.unmoveTargets(position, piece, square):
+                        previous = (index ^ (square << (6 * i)) ^ (origin << (6 * i))) ^ (1 << sideShift)
+
+                        if not legal[previous] or values[previous]:
+                            continue
+
+                        # Moving into a lost position wins
+                        if plies & 1 == 0:
+                            buckets[plies + 1].append(previous)
+
+                        # Moving into a won position loses, and the previous position is lost once all its moves are
+                        elif remaining[previous] != Tablebase.DRAWN:
+                            remaining[previous] -= 1
+                            slowestLoss[previous] = max(slowestLoss[previous], plies)
+                            if remaining[previous] == 0:
+                                buckets[slowestLoss[previous] + 1].append(previous)
+
+                for square in squares:
+                    board[square >> 3][square & 7] = 0
+
+        return values
+
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Generate endgame tables or look up a position in them')
+    parser.add_argument('--dir', default='tablebases', help='folder of the table files')
+    parser.add_argument('--generate', nargs='*', default=[], help='tables to generate, such as KQK KRK KPK')
+    parser.add_argument('--fen', default=None, help='position to look up')
+    args = parser.parse_args()
+
+    tablebase = Tablebase(args.dir)
+
+    for name in args.generate:
+        start = time.perf_counter()
+        data = tablebase.table(name, True)
+        print('{} {} positions in {:.1f}s'.format(name, len(data), time.perf_counter() - start))
+
+    if args.fen is not None:
+        game = Chess(fen=args.fen)
+        entry = tablebase.probe(game)
+
+        if entry is None:
+            print('position not in the tablebase')
+        else:
+            result, plies = entry
+            print('draw' if result == 0 else '{} in {} plies'.format('win' if result > 0 else 'loss', plies))
+            bestMove = tablebase.bestMove(game)
+            if bestMove:
+                print('bestmove', Move.toString(bestMove))
+
+if __name__ == "__main__":
+    main()
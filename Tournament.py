@@ -0,0 +1,489 @@
+import argparse
+import json
+import math
+import random
+import shlex
+import subprocess
+import time
+from typing import Iterator
+
+from BatchRunner import BatchRunner, ERROR
+from Chess import Chess
+from Move import Move
+from OpeningBook import OpeningBook
+from PieceType import PieceType
+from Search import Search
+from Tablebase import Tablebase
+from TranspositionTable import TranspositionTable
+
+
+# Tablebases opened by a worker process, by folder, kept between games so their files are mapped once
+WORKER_TABLEBASES = {}
+
+
+class Tournament:
+    """
+    Plays games between two engine players on a pool of worker processes and keeps the score.
+    Every opening is played twice with the colours swapped. A player is a dict of settings:
+    - name: name written to the results
+    - depth: deepest iteration to search, the limit when there is no time control
+    - hash: transposition table megabytes, a new table for every game
+    - tablebases: folder of endgame tables, or None
+    - command: command line of a UCI engine to play instead of this version's Search, such as
+      'python3 ../old/Uci.py' to test a change against an earlier version, or None
+    Games end by checkmate, stalemate, threefold repetition, the fifty-move rule, insufficient
+    material, running out of time, or reaching the ply limit, which is scored as a draw.
+    """
+
+    # Settings of a player not given in its description
+    DEFAULT_PLAYER = {'name': None, 'depth': 4, 'hash': 16, 'tablebases': None, 'command': None}
+
+    # Random moves played from each opening when there is no book
+    RANDOM_PLIES = 8
+
+    def parsePlayer(description : str, name : str) -> dict:
+        """
+        Returns the settings of a player from a description such as 'name=new,depth=5,hash=32' or
+        'name=old,command=python3 ../old/Uci.py'
+        - description: comma separated key=value settings
+        - name: name to use if the description has none
+        """
+        player = dict(Tournament.DEFAULT_PLAYER)
+        player['name'] = name
+
+        for setting in filter(None, description.split(',')):
+            key, separator, value = setting.partition('=')
+            if key not in player or not separator:
+                raise ValueError('Unknown player setting: ' + setting)
+            player[key] = value
+
+        player['depth'] = int(player['depth'])
+        player['hash'] = float(player['hash'])
+
+        return player
+
+
+    def parseTimeControl(text : str) -> tuple:
+        """
+        Returns (seconds, increment) from a time control such as '10+0.1', None for no clock
+        """
+        if text is None:
+            return None
+
+        seconds, separator, increment = text.partition('+')
+        return (float(seconds), float(increment) if separator else 0.0)
+
+
+    def readOpenings(path : str) -> list:
+        """
+        Returns the FEN positions of a file, one per line, or the initial position if path is None
+        """
+        if path is None:
+            return [Chess().toFEN()]
+
+        with open(path) as file:
+            return [line.strip() for line in file if line.strip() and not line.startswith('#')]
+
+
+    def bookLine(book : OpeningBook, fen : str, plies : int, generator : random.Random) -> list:
+        """
+        Returns up to plies encoded book moves from a position, each picked at random by weight
+        """
+        game = Chess(fen=fen)
+        moves = []
+
+        for ply in range(plies):
+            move = book.chooseMove(game, generator)
+            if not move:
+                break
+            game.makeMove(move)
+            moves.append(move)
+
+        return moves
+
+
+    def randomLine(fen : str, plies : int, generator : random.Random) -> list:
+        """
+        Returns up to plies encoded legal moves from a position, each picked at random
+        """
+        game = Chess(fen=fen)
+        moves = []
+
+        for ply in range(plies):
+            legalMoves = game.legalMoves()
+            if not legalMoves:
+                break
+            move = generator.choice(legalMoves)
+            game.makeMove(move)
+            moves.append(move)
+
+        return moves
+
+
+    def insufficientMaterial(game : Chess) -> bool:
+        """
+        Returns True if neither side can checkmate: kings alone, or kings and one knight or bishop
+        """
+        pieces = [abs(p.type) for p in game.whitePieces + game.blackPieces if abs(p.type) != PieceType.WHITEKING.value]
+
+        return not pieces or (len(pieces) == 1 and pieces[0] in (PieceType.WHITEKNIGHT.value, PieceType.WHITEBISHOP.value))
+
+
+    def eloDifference(wins : int, draws : int, losses : int) -> tuple:
+        """
+        Returns (Elo difference, 95% error margin) of a score, the margin None with too few games
+        """
+        games = wins + draws + losses
+        if games == 0:
+            return (0.0, None)
+
+        score = (wins + draws / 2) / games
+        variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+        error = 1.96 * math.sqrt(variance / games)
+
+        if variance == 0:
+            return (Tournament.elo(score), None)
+
+        return (Tournament.elo(score), (Tournament.elo(score + error) - Tournament.elo(score - error)) / 2)
+
+
+    def elo(score : float) -> float:
+        """
+        Returns the Elo difference expected to give a score between 0 and 1, clamped short of infinity
+        """
+        score = min(max(score, 1e-6), 1 - 1e-6)
+        return -400 * math.log10(1 / score - 1)
+
+
+    def sprt(wins : int, draws : int, losses : int, elo0 : float, elo1 : float, alpha : float = 0.05, beta : float = 0.05) -> tuple:
+        """
+        Returns (log likelihood ratio, lower bound, upper bound) of a sequential probability ratio
+        test of elo1 against elo0, using the normal approximation of the score. The test accepts
+        elo1 once the ratio passes the upper bound and elo0 once it falls below the lower one.
+        """
+        lower = math.log(beta / (1 - alpha))
+        upper = math.log((1 - beta) / alpha)
+
+        games = wins + draws + losses
+        if games == 0:
+            return (0.0, lower, upper)
+
+        score = (wins + draws / 2) / games
+        variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+        if variance == 0:
+            return (0.0, lower, upper)
+
+        # Expected scores of the two hypotheses
+        score0 = 1 / (1 + 10 ** (-elo0 / 400))
+        score1 = 1 / (1 + 10 ** (-elo1 / 400))
+
+        return (games * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance), lower, upper)
+
+
+    def __init__(self, players : list, timeControl : tuple = None, maxPlies : int = 400, processes : int = None) -> None:
+        """
+        Creates a tournament between two players
+        - players: settings of the two players, from parsePlayer
+        - timeControl: (seconds, increment) for each player, None to search to the players' depths
+        - maxPlies: plies after which a game is adjudicated a draw
+        - processes: worker processes, the number of cores if None
+        """
+        self.players = players
+        self.timeControl = timeControl
+        self.maxPlies = maxPlies
+        self.runner = BatchRunner(processes, 1)
+
+        # Results of the first player
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+
+        # Games that failed to play, such as an engine that couldn't start or crashed, left unscored
+        self.errors = 0
+
+
+    def items(self, games : int, openings : list) -> Iterator[tuple]:
+        """
+        Yields the game descriptions sent to the workers, the colours swapping on every game
+        - games: number of games
+        - openings: (FEN, encoded moves) starting positions, cycled through in pairs
+        """
+        for index in range(games):
+            fen, moves = openings[(index // 2) % len(openings)]
+            white, black = self.players if index % 2 == 0 else self.players[::-1]
+
+            yield (index, fen, moves, white, black, self.timeControl, self.maxPlies)
+
+
+    def run(self, games : int, openings : list, output = None, sprtBounds : tuple = None) -> Iterator[dict]:
+        """
+        Plays the games and yields each game's result dict as it is scored, in game order. Stops
+        early once the SPRT accepts a hypothesis. A game that fails is printed and counted in
+        errors, but not scored, written or yielded.
+        - games: number of games
+        - openings: (FEN, encoded moves) starting positions
+        - output: open file to write every result to as a JSON line, or None
+        - sprtBounds: (elo0, elo1) to test, or None to play every game
+        """
+        first = self.players[0]['name']
+
+        # Results come back in game order
+        for index, result in enumerate(self.runner.run(playGame, self.items(games, openings))):
+
+            if isinstance(result, tuple) and result[0] == ERROR:
+                self.errors += 1
+                print('game {} error: {}'.format(index + 1, result[1]))
+                continue
+
+            # Score from the first player's view
+            if result['result'] == '1/2-1/2':
+                self.draws += 1
+            elif (result['result'] == '1-0') == (result['white'] == first):
+                self.wins += 1
+            else:
+                self.losses += 1
+
+            if output is not None:
+                output.write(json.dumps(result) + '\n')
+                output.flush()
+
+            yield result
+
+            if sprtBounds is not None:
+                llr, lower, upper = Tournament.sprt(self.wins, self.draws, self.losses, *sprtBounds)
+                if llr <= lower or llr >= upper:
+                    break
+
+
+
+class UciEngine:
+    """
+    Player run as a separate engine process speaking the Universal Chess Interface, so a game can
+    be played against another version of this engine or any other engine
+    - command: command line starting the engine
+    - hash: transposition table megabytes to set
+    - tablebases: folder of endgame tables to set, or None
+    """
+
+    def __init__(self, command : str, hash : float, tablebases : str = None) -> None:
+        self.command = command
+        self.process = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+
+        self.send('uci')
+        self.waitFor('uciok')
+        self.send('setoption name Hash value {}'.format(int(hash)))
+        if tablebases:
+            self.send('setoption name TablebasePath value ' + tablebases)
+        self.send('ucinewgame')
+        self.send('isready')
+        self.waitFor('readyok')
+
+
+    def send(self, line : str) -> None:
+        """
+        Writes a command line to the engine
+        """
+        self.process.stdin.write(line + '\n')
+        self.process.stdin.flush()
+
+
+    def waitFor(self, command : str) -> list:
+        """
+        Reads the engine's replies up to one starting with a command and returns its words. Raises
+        RuntimeError if the engine exits first.
+        """
+        for line in self.process.stdout:
+            tokens = line.split()
+            if tokens and tokens[0] == command:
+                return tokens
+
+        raise RuntimeError('engine exited: ' + self.command)
+
+
+    def bestMove(self, fen : str, moves : list, depth : int, clocks : list = None, increment : float = 0) -> str:
+        """
+        Returns the move the engine plays in coordinate notation
+        - fen: starting position of the game
+        - moves: moves played since, in coordinate notation
+        - depth: depth to search when there is no clock
+        - clocks: seconds left for white and black, None to search to depth
+        - increment: seconds added after every move
+        """
+        self.send('position fen {} moves {}'.format(fen, ' '.join(moves)) if moves else 'position fen ' + fen)
+
+        if clocks is None:
+            self.send('go depth {}'.format(depth))
+        else:
+            self.send('go wtime {} btime {} winc {} binc {}'.format(int(clocks[0] * 1000), int(clocks[1] * 1000), int(increment * 1000), int(increment * 1000)))
+
+        tokens = self.waitFor('bestmove')
+        return tokens[1] if len(tokens) > 1 else '0000'
+
+
+    def close(self) -> None:
+        """
+        Asks the engine to quit, killing it if it doesn't
+        """
+        try:
+            self.send('quit')
+            self.process.wait(5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+            self.process.wait()
+
+
+
+def playGame(item : tuple) -> dict:
+    """
+    Plays one game in a worker process and returns its result dict
+    - item: (game index, FEN, encoded opening moves, white settings, black settings, time control, ply limit)
+    """
+    index, fen, openingMoves, white, black, timeControl, maxPlies = item
+    start = time.perf_counter()
+
+    game = BatchRunner.deserializeGame((fen, openingMoves))
+    openingText = [Move.toString(move) for move in openingMoves]
+
+    # One search or engine per player, so each keeps its own table and move ordering for the whole game
+    searches = []
+    try:
+        for player in (white, black):
+            if player['command']:
+                searches.append(UciEngine(player['command'], player['hash'], player['tablebases']))
+                continue
+
+            tablebase = None
+            if player['tablebases']:
+                tablebase = WORKER_TABLEBASES.setdefault(player['tablebases'], Tablebase(player['tablebases']))
+            searches.append(Search(game, TranspositionTable(player['hash']), tablebase))
+
+        clocks = [timeControl[0], timeControl[0]] if timeControl else None
+        moves = []
+        result, reason = '1/2-1/2', 'ply limit'
+
+        while len(moves) < maxPlies:
+            side = 0 if game.whiteTurn else 1
+            legalMoves = game.legalMoves()
+
+            if not legalMoves:
+                if game.whiteInCheck or game.blackInCheck:
+                    result, reason = ('0-1' if side == 0 else '1-0'), 'checkmate'
+                else:
+                    reason = 'stalemate'
+                break
+
+            if game.isThreefoldRepetition():
+                reason = 'threefold repetition'
+                break
+            if game.isFiftyMoveDraw():
+                reason = 'fifty-move rule'
+                break
+            if Tournament.insufficientMaterial(game):
+                reason = 'insufficient material'
+                break
+
+            search = searches[side]
+            depth = (white, black)[side]['depth']
+            moveStart = time.perf_counter()
+
+            if isinstance(search, UciEngine):
+                text = search.bestMove(fen, openingText + moves, depth, clocks, timeControl[1] if timeControl else 0)
+                move = {Move.toString(legal): legal for legal in legalMoves}.get(text)
+                if move is None:
+                    result, reason = ('0-1' if side == 0 else '1-0'), 'illegal move ' + text
+                    break
+            elif clocks is None:
+                move, pv = search.search(depth)
+            else:
+                move, pv = search.search(Search.MAX_PLY, Search.timeBudget(clocks[side], timeControl[1]))
+
+            if clocks is not None:
+                clocks[side] -= time.perf_counter() - moveStart
+                if clocks[side] < 0:
+                    result, reason = ('0-1' if side == 0 else '1-0'), 'time forfeit'
+                    break
+                clocks[side] += timeControl[1]
+
+            game.makeMove(move)
+            moves.append(Move.toString(move))
+
+    finally:
+        for search in searches:
+            if isinstance(search, UciEngine):
+                search.close()
+
+    return {
+        'game': index,
+        'white': white['name'],
+        'black': black['name'],
+        'opening': fen,
+        'openingMoves': openingText,
+        'result': result,
+        'reason': reason,
+        'plies': len(moves),
+        'moves': moves,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Play games between two engine players and measure their strength difference')
+    parser.add_argument('--engine1', default='', help="first player's settings, such as name=new,depth=5,hash=16,tablebases=tb or name=old,command=python3 ../old/Uci.py")
+    parser.add_argument('--engine2', default='', help="second player's settings")
+    parser.add_argument('--games', type=int, default=100, help='games to play, every opening twice with the colours swapped')
+    parser.add_argument('--tc', default=None, help='time control in seconds plus increment such as 10+0.1, depth limited games if not given')
+    parser.add_argument('--max-plies', type=int, default=400, help='plies after which a game is a draw')
+    parser.add_argument('--openings', default=None, help='file with one FEN per line to start games from')
+    parser.add_argument('--book', default=None, help='opening book to play random moves from after each opening')
+    parser.add_argument('--book-plies', type=int, default=8, help='book moves to play from each opening')
+    parser.add_argument('--random-plies', type=int, default=None, help='random moves to play from each opening when there is no book, {} when there are no openings either'.format(Tournament.RANDOM_PLIES))
+    parser.add_argument('--seed', type=int, default=0, help='seed for the book and random moves')
+    parser.add_argument('--sprt', type=float, nargs=2, default=None, metavar=('ELO0', 'ELO1'), help='stop once a sequential test of the first player being ELO1 rather than ELO0 stronger ends')
+    parser.add_argument('--output', default='tournament.jsonl', help='file to write each game result to as a JSON line')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes, the number of cores by default')
+    args = parser.parse_args()
+
+    players = [Tournament.parsePlayer(args.engine1, 'engine1'), Tournament.parsePlayer(args.engine2, 'engine2')]
+    tournament = Tournament(players, Tournament.parseTimeControl(args.tc), args.max_plies, args.processes)
+
+    # One opening for every pair of games, each position followed by a line of book moves, or of
+    # random moves without a book, so the games don't all repeat the same deterministic line
+    randomPlies = args.random_plies
+    if randomPlies is None:
+        randomPlies = 0 if args.openings else Tournament.RANDOM_PLIES
+
+    generator = random.Random(args.seed)
+    book = OpeningBook(args.book) if args.book else None
+    fens = Tournament.readOpenings(args.openings)
+    openings = []
+    for pair in range((args.games + 1) // 2):
+        fen = fens[pair % len(fens)]
+        if book is not None:
+            openings.append((fen, Tournament.bookLine(book, fen, args.book_plies, generator)))
+        else:
+            openings.append((fen, Tournament.randomLine(fen, randomPlies, generator)))
+    if book is not None:
+        book.close()
+
+    start = time.perf_counter()
+
+    with open(args.output, 'w') as output:
+        for result in tournament.run(args.games, openings, output, args.sprt):
+            elo, error = Tournament.eloDifference(tournament.wins, tournament.draws, tournament.losses)
+            line = 'game {} {} - {} {} ({}) score {}-{}-{} elo {:+.1f} +/- {}'.format(result['game'] + 1, result['white'], result['black'], result['result'], result['reason'], tournament.wins, tournament.draws, tournament.losses, elo, '{:.1f}'.format(error) if error is not None else 'inf')
+
+            if args.sprt is not None:
+                llr, lower, upper = Tournament.sprt(tournament.wins, tournament.draws, tournament.losses, *args.sprt)
+                line += ' llr {:.2f} ({:.2f}, {:.2f})'.format(llr, lower, upper)
+
+            print(line)
+
+    games = tournament.wins + tournament.draws + tournament.losses
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    print('{} games in {:.1f}s, {:.0f} games/hour, {} errors, results in {}'.format(games, elapsed, games * 3600 / elapsed, tournament.errors, args.output))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+from array import array
+
+
+class TranspositionTable:
+    """
+    Fixed size table of search results keyed by the Zobrist hash of the position. Entries live in
+    two flat arrays of 64-bit words, one for the hashes and one for the packed results, so the
+    table's memory is set once when it is created. Entries are stored in buckets of two: the first
+    slot keeps the deepest result of the current search, the second always takes the newest.
+    Packed result layout:
+    - bits 0-17: best move, encoded by Move.encode, 0 if none
+    - bits 18-19: bound type, EXACT, LOWER or UPPER, 0 for an empty entry
+    - bits 20-27: depth searched
+    - bits 28-35: age, the search the entry was stored in
+    - bits 36-56: score offset by SCORE_OFFSET so it is never negative
+    """
+
+    EXACT = 1
+    LOWER = 2
+    UPPER = 3
+
+    ENTRY_BYTES = 16
+    SCORE_OFFSET = 1 << 20
+
+    def __init__(self, megabytes : float = 16) -> None:
+        """
+        Creates an empty table
+        - megabytes: memory to use, rounded down to a power of two number of entries
+        """
+        entries = 2
+        while entries * 2 * TranspositionTable.ENTRY_BYTES <= megabytes * (1 << 20):
+            entries *= 2
+
+        # Index of the first slot of a bucket, always even
+        self.mask = entries - 2
+
+        self.keys = array('Q', [0]) * entries
+        self.data = array('Q', [0]) * entries
+
+        # Incremented for every new search so old entries can be replaced
+        self.age = 0
+
+
+    def size(self) -> int:
+        """
+        Returns the memory used by the entries in bytes
+        """
+        return len(self.keys) * TranspositionTable.ENTRY_BYTES
+
+
+    def clear(self) -> None:
+        """
+        Empties every entry
+        """
+        entries = len(self.keys)
+        self.keys = array('Q', [0]) * entries
+        self.data = array('Q', [0]) * entries
+        self.age = 0
+
+
+    def newSearch(self) -> None:
+        """
+        Ages the table, entries from earlier searches become the first to be replaced
+        """
+        self.age = (self.age + 1) & 0xFF
+
+
+    def probe(self, key : int) -> tuple:
+        """
+        Returns (depth, bound, score, move) stored for a position, or None if it isn't in the table
+        - key: Zobrist hash of the position
+        """
+        index = key & self.mask
+
+        if self.keys[index] == key:
+            data = self.data[index]
+        elif self.keys[index + 1] == key:
+            data = self.data[index + 1]
+        else:
+            return None
+
+        if not (data >> 18) & 3:
+            return None
+
+        return ((data >> 20) & 0xFF, (data >> 18) & 3, ((data >> 36) & 0x1FFFFF) - TranspositionTable.SCORE_OFFSET, data & 0x3FFFF)
+
+
+    def store(self, key : int, depth : int, bound : int, score : int, move : int) -> None:
+        """
+        Stores a search result. The first slot of the bucket is replaced if it holds the same
+        position, an older search or a shallower result, otherwise the result goes in the second slot.
+        - key: Zobrist hash of the position
+        - depth: depth the position was searched to
+        - bound: EXACT, LOWER if the score is at least the real score, UPPER if at most
+        - score: score of the position
+        - move: best move found, 0 if none
+        """
+        index = key & self.mask
+        data = self.data[index]
+
+        if not (self.keys[index] == key or ((data >> 28) & 0xFF) != self.age or depth >= (data >> 20) & 0xFF):
+            index += 1
+            data = self.data[index]
+
+        # Keep the old best move when the new result doesn't have one
+        if move == 0 and self.keys[index] == key:
+            move = data & 0x3FFFF
+
+        self.keys[index] = key
+        self.data[index] = (move | (bound << 18) | (min(depth, 0xFF) << 20) | (self.age << 28)
+                            | ((score + TranspositionTable.SCORE_OFFSET) << 36))
+
+
+    def hashfull(self) -> int:
+        """
+        Returns how full the table is in permille, sampled from the first thousand entries
+        """
+        sample = min(1000, len(self.data))
+        used = sum(1 for i in range(sample) if (self.data[i] >> 18) & 3 and (self.data[i] >> 28) & 0xFF == self.age)
+
+        return used * 1000 // sample
@@ -0,0 +1,360 @@
+import argparse
+import multiprocessing
+import sys
+import threading
+import time
+
+from Chess import Chess
+from Move import Move
+from Search import Search, SearchPool
+from Tablebase import Tablebase
+from TranspositionTable import TranspositionTable
+
+
+class Uci:
+    """
+    Universal Chess Interface front-end, reading commands from an input stream and writing the
+    replies to an output stream so the engine can run under a GUI or tournament manager. Searches
+    run on a background thread, so stop, isready and ponderhit are answered while one is running.
+    Supported commands: uci, isready, setoption (Hash, Threads, Ponder, TablebasePath), ucinewgame,
+    position, go (depth, movetime, wtime, btime, winc, binc, movestogo, infinite, ponder), stop,
+    ponderhit and quit. Searches with more than one thread split the root moves over a pool of
+    processes, infinite and ponder searches included. The pool starts when the Threads option is
+    set and is kept for every search, and stop cancels the root moves it is working on.
+    - input: stream of commands, one per line
+    - output: stream the replies are written to
+    """
+
+    NAME = 'Chess'
+    AUTHOR = 'the Chess authors'
+
+    # Option limits announced to the GUI
+    MAX_HASH = 4096
+    MAX_THREADS = 64
+
+    def __init__(self, input = sys.stdin, output = sys.stdout, hash : float = 16, tablebases : str = None) -> None:
+        """
+        Creates a front-end at the initial position
+        - input: stream of commands
+        - output: stream for the replies
+        - hash: transposition table megabytes
+        - tablebases: folder of endgame tables, or None
+        """
+        self.input = input
+        self.output = output
+        self.outputLock = threading.Lock()
+
+        # Options
+        self.hash = hash
+        self.threads = 1
+        self.pool = None
+        self.table = TranspositionTable(hash)
+        self.tablebase = Tablebase(tablebases) if tablebases else None
+
+        # Position to search, set by position commands
+        self.game = Chess()
+
+        # The running search, its thread, the time it gets once a ponder search becomes a normal one,
+        # and the deadline ponderhit set for it
+        self.search = None
+        self.thread = None
+        self.ponderTime = None
+        self.ponderDeadline = None
+
+        # Set when an infinite or ponder search may report its move
+        self.released = threading.Event()
+
+
+    def send(self, line : str) -> None:
+        """
+        Writes a reply line, from any thread
+        """
+        with self.outputLock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+
+    def loop(self) -> None:
+        """
+        Handles commands until quit or the end of the input
+        """
+        for line in self.input:
+            if not self.handle(line.split()):
+                break
+
+        self.stop()
+        self.setThreads(1)
+
+
+    def handle(self, tokens : list) -> bool:
+        """
+        Handles one command, returning False on quit. Unknown commands are ignored.
+        - tokens: words of the command
+        """
+        if not tokens:
+            return True
+
+        command, arguments = tokens[0], tokens[1:]
+
+        if command == 'uci':
+            self.send('id name ' + Uci.NAME)
+            self.send('id author ' + Uci.AUTHOR)
+            self.send('option name Hash type spin default {} min 1 max {}'.format(int(self.hash), Uci.MAX_HASH))
+            self.send('option name Threads type spin default 1 min 1 max {}'.format(Uci.MAX_THREADS))
+            self.send('option name Ponder type check default false')
+            self.send('option name TablebasePath type string default <empty>')
+            self.send('uciok')
+
+        elif command == 'isready':
+            self.send('readyok')
+
+        elif command == 'setoption':
+            self.setOption(arguments)
+
+        elif command == 'ucinewgame':
+            self.stop()
+            self.table.clear()
+            self.game = Chess()
+
+        elif command == 'position':
+            self.stop()
+            self.setPosition(arguments)
+
+        elif command == 'go':
+            self.stop()
+            self.go(arguments)
+
+        elif command == 'stop':
+            self.stop()
+
+        elif command == 'ponderhit':
+            self.ponderHit()
+
+        elif command == 'quit':
+            return False
+
+        return True
+
+
+    def setOption(self, arguments : list) -> None:
+        """
+        Handles 'setoption name <name> value <value>'
+        """
+        text = ' '.join(arguments)
+        name, separator, value = text.partition(' value ')
+        name = name.replace('name', '', 1).strip().lower()
+        value = value.strip()
+
+        # The table is replaced between searches only
+        self.stop()
+
+        try:
+            if name == 'hash':
+                self.hash = min(max(float(value), 1), Uci.MAX_HASH)
+                self.table = TranspositionTable(self.hash)
+            elif name == 'threads':
+                self.setThreads(min(max(int(value), 1), Uci.MAX_THREADS))
+            elif name == 'tablebasepath':
+                self.tablebase = Tablebase(value) if value and value != '<empty>' else None
+        except ValueError:
+            self.send('info string invalid value for ' + name + ': ' + value)
+
+
+    def setThreads(self, threads : int) -> None:
+        """
+        Sets the number of threads, starting the process pool for more than one
+        - threads: processes to split the root moves over, 1 to search in this process
+        """
+        if self.pool is not None and self.pool.processes != threads:
+            self.pool.close()
+            self.pool = None
+
+        self.threads = threads
+        if threads > 1 and self.pool is None:
+            self.pool = SearchPool(threads)
+
+
+    def setPosition(self, arguments : list) -> None:
+        """
+        Handles 'position startpos|fen <fen> [moves <moves>]'
+        """
+        if 'moves' in arguments:
+            split = arguments.index('moves')
+            arguments, moves = arguments[:split], arguments[split + 1:]
+        else:
+            moves = []
+
+        try:
+            if arguments and arguments[0] == 'fen':
+                game = Chess(fen=' '.join(arguments[1:]))
+            else:
+                game = Chess()
+        except ValueError as error:
+            self.send('info string ' + str(error))
+            return
+
+        # Moves are matched against the legal moves, since coordinates alone miss the move flags
+        for text in moves:
+            legal = {Move.toString(move): move for move in game.legalMoves()}
+            if text not in legal:
+                self.send('info string illegal move ' + text)
+                break
+            game.makeMove(legal[text])
+
+        self.game = game
+
+
+    def timeBudget(parameters : dict, whiteTurn : bool) -> float:
+        """
+        Returns the seconds to search from the go parameters, None if the search isn't timed
+        - parameters: go parameters by name, times in milliseconds
+        - whiteTurn: True if white is to move
+        """
+        if 'movetime' in parameters:
+            return parameters['movetime'] / 1000
+
+        clock = parameters.get('wtime' if whiteTurn else 'btime')
+        if clock is None:
+            return None
+
+        increment = parameters.get('winc' if whiteTurn else 'binc', 0)
+        return Search.timeBudget(clock, increment, parameters.get('movestogo')) / 1000
+
+
+    def go(self, arguments : list) -> None:
+        """
+        Handles 'go', starting a search on the background thread
+        """
+        parameters = {}
+        flags = set()
+        i = 0
+
+        while i < len(arguments):
+            if arguments[i] in ('infinite', 'ponder'):
+                flags.add(arguments[i])
+                i += 1
+            elif i + 1 < len(arguments):
+                try:
+                    parameters[arguments[i]] = int(arguments[i + 1])
+                except ValueError:
+                    pass
+                i += 2
+            else:
+                i += 1
+
+        timeLimit = Uci.timeBudget(parameters, self.game.whiteTurn)
+        depth = min(parameters.get('depth', Search.MAX_PLY), Search.MAX_PLY)
+        infinite = bool(flags)
+
+        # A ponder search runs until ponderhit gives it the time it would have had
+        self.ponderTime = timeLimit if 'ponder' in flags else None
+        self.ponderDeadline = None
+        if infinite:
+            timeLimit = None
+            self.released.clear()
+        else:
+            self.released.set()
+
+        self.search = Search(self.game, self.table, self.tablebase)
+        self.search.addIterationListener(self.sendInfo)
+        self.search.addIterationListener(self.applyPonderDeadline)
+        self.thread = threading.Thread(target=self.run, args=(self.search, depth, timeLimit), daemon=True)
+        self.thread.start()
+
+
+    def run(self, search : Search, depth : int, timeLimit : float) -> None:
+        """
+        Searches on the background thread and reports the best move, after stop or ponderhit for
+        an infinite or ponder search
+        """
+        if self.threads > 1:
+            bestMove, pv = search.searchRootSplit(depth, timeLimit=timeLimit, pool=self.pool)
+        else:
+            bestMove, pv = search.search(depth, timeLimit)
+
+        self.released.wait()
+
+        if not bestMove:
+            self.send('bestmove 0000')
+        elif len(pv) > 1:
+            self.send('bestmove {} ponder {}'.format(Move.toString(bestMove), Move.toString(pv[1])))
+        else:
+            self.send('bestmove ' + Move.toString(bestMove))
+
+
+    def sendInfo(self, depth : int, score : int, nodes : int, seconds : float, pv : list) -> None:
+        """
+        Reports a completed iteration, mate scores as moves to mate. The table fill is only known
+        for searches in this process, root split searches fill the tables of their workers.
+        """
+        if score >= Search.MATE - Search.MAX_PLY:
+            scoreText = 'mate {}'.format((Search.MATE - score + 1) // 2)
+        elif score <= -Search.MATE + Search.MAX_PLY:
+            scoreText = 'mate {}'.format(-((Search.MATE + score) // 2))
+        else:
+            scoreText = 'cp {}'.format(score)
+
+        hashfull = ' hashfull {}'.format(self.table.hashfull()) if self.threads == 1 else ''
+
+        self.send('info depth {} score {} nodes {} time {} nps {}{} pv {}'.format(depth, scoreText, nodes, int(seconds * 1000), int(nodes / max(seconds, 1e-9)), hashfull, ' '.join(Move.toString(move) for move in pv)))
+
+
+    def stop(self) -> None:
+        """
+        Stops the running search, if any, and waits for it to report its move
+        """
+        if self.thread is None:
+            return
+
+        # The thread may not have started searching yet, which would clear the stop, so keep stopping it
+        self.released.set()
+        while self.thread.is_alive():
+            self.search.stop()
+            self.thread.join(0.05)
+
+        self.thread = None
+        self.search = None
+
+
+    def ponderHit(self) -> None:
+        """
+        The opponent played the expected move, so the ponder search carries on as a normal search
+        with the time it would have had from now
+        """
+        if self.thread is None:
+            return
+
+        if self.ponderTime is not None:
+            self.ponderDeadline = time.perf_counter() + self.ponderTime
+            self.search.deadline = self.ponderDeadline
+        else:
+            self.search.stop()
+        self.released.set()
+
+
+    def applyPonderDeadline(self, depth : int, score : int, nodes : int, seconds : float, pv : list) -> None:
+        """
+        Iteration listener giving the search the deadline set by ponderhit. A search clears its
+        deadline when it starts, which could undo a ponderhit arriving just after go ponder, and
+        the deadline is only checked once the first iteration has completed.
+        """
+        if self.ponderDeadline is not None:
+            self.search.deadline = self.ponderDeadline
+
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Run the engine with the Universal Chess Interface on standard input and output')
+    parser.add_argument('--hash', type=float, default=16, help='transposition table size in megabytes')
+    parser.add_argument('--tablebases', default=None, help='folder of endgame tables to look up')
+    args = parser.parse_args()
+
+    # Worker processes forked while the main thread waits on standard input would hang closing
+    # their copy of it, so searches with several threads start fresh processes
+    multiprocessing.set_start_method('spawn')
+
+    Uci(sys.stdin, sys.stdout, args.hash, args.tablebases).loop()
+
+if __name__ == "__main__":
+    main()
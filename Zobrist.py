@@ -0,0 +1,41 @@
+import random
+
+
+# Fixed seed so hashes match between processes and runs
+KEY_GENERATOR = random.Random(0x5EED0C4E55)
+
+
+class Zobrist:
+    """
+    Random 64-bit keys for Zobrist hashing of Chess positions. A position's hash is the xor of the
+    keys of every piece on its square, the en passant file and the side to move, so a move changes
+    it with a few xors.
+    - PIECES: keys indexed [PieceType value + 6][square], square being y * 8 + x
+    - EN_PASSANT: keys indexed by the file of a pawn that just moved two squares
+    - BLACK_TURN: key included when black is to move
+    """
+
+    PIECES = [[KEY_GENERATOR.getrandbits(64) for square in range(64)] for piece in range(13)]
+    EN_PASSANT = [KEY_GENERATOR.getrandbits(64) for file in range(8)]
+    BLACK_TURN = KEY_GENERATOR.getrandbits(64)
+
+
+    def hashPosition(game) -> int:
+        """
+        Computes the hash of a position from scratch
+        - game: Chess game to hash
+        """
+        key = 0
+
+        for y, row in enumerate(game.board):
+            for x, piece in enumerate(row):
+                if piece != 0:
+                    key ^= Zobrist.PIECES[piece + 6][y * 8 + x]
+
+        for file in game.twoWhitePawnMovement | game.twoBlackPawnMovement:
+            key ^= Zobrist.EN_PASSANT[file]
+
+        if not game.whiteTurn:
+            key ^= Zobrist.BLACK_TURN
+
+        return key